@@ -1,5 +1,13 @@
 import numpy as np
 import matplotlib.pyplot as plt
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from vanet.render import show_figure
+from vanet.replicas import run_replicas, summarise_replicas
+from vanet.ringroad import RingRoad, random_layouts
 
 class Vehicle:
     def __init__(self, position, speed, transmission_range, power_level):
@@ -24,50 +32,74 @@ def initialize_road(length, density):
         road[position] = 1
     return road
 
-def update_vehicle_position(vehicle, road):
-    new_position = (vehicle.position + vehicle.speed) % len(road)
-    road[vehicle.position] = 0
-    vehicle.position = new_position
-    road[vehicle.position] = 1
-
-def calculate_density(reference_vehicle, vehicles):
-    num_nodes_in_range = 0
-    for vehicle in vehicles:
-        distance = abs(vehicle.position - reference_vehicle.position)
-        if distance <= reference_vehicle.transmission_range:
-            num_nodes_in_range += 1
-    return num_nodes_in_range / len(vehicles)
+def calculate_density(reference_vehicle, positions):
+    num_nodes_in_range = np.count_nonzero(check_communication(positions, reference_vehicle))
+    return num_nodes_in_range / len(positions)
 
 def adjust_transmission_range(transmission_range, density, max_density):
     return transmission_range * (density / max_density)
 
-def check_communication(vehicle, reference_vehicle):
-    distance = abs(vehicle.position - reference_vehicle.position)
-    if distance <= reference_vehicle.transmission_range:
-        return True
-    return False
+def check_communication(positions, reference_vehicle):
+    distance = np.abs(positions - reference_vehicle.position)
+    return distance <= reference_vehicle.transmission_range
 
-def count_exposed_nodes(reference_vehicle, vehicles):
-    exposed_nodes = 0
-    for vehicle in vehicles:
-        if not check_communication(vehicle, reference_vehicle):
-            exposed_nodes += 1
-    return exposed_nodes
+def count_exposed_nodes(reference_vehicle, positions):
+    return int(np.count_nonzero(~check_communication(positions, reference_vehicle)))
 
-def run_simulation(road, vehicles, time_steps, reference_vehicle, initial_transmission_range):
+def run_simulation(road, vehicles, time_steps, reference_vehicle, initial_transmission_range, rigid=True, max_speed=None, slowdown_probability=0.0, seed=None):
+    # rigid keeps the original model, where every vehicle moves by its own speed regardless of the car ahead;
+    # rigid=False runs Nagel-Schreckenberg traffic instead, in which a vehicle with no gap in front stands still
+    speeds = [vehicle.speed for vehicle in vehicles]
+    ring = RingRoad(len(road), [vehicle.position for vehicle in vehicles], speeds, max_speed or max(speeds), slowdown_probability, seed, rigid)
     initial_exposed_nodes = []
     final_exposed_nodes = []
     max_density = 0.5  # Maximum density for normalization
     for t in range(time_steps):
-        density = calculate_density(reference_vehicle, vehicles)
+        density = calculate_density(reference_vehicle, ring.positions)
         if t == time_steps // 2:
             reference_vehicle.transmission_range = adjust_transmission_range(initial_transmission_range, density, max_density)
-        initial_exposed_nodes.append(count_exposed_nodes(reference_vehicle, vehicles))
-        for vehicle in vehicles:
-            update_vehicle_position(vehicle, road)
-        final_exposed_nodes.append(count_exposed_nodes(reference_vehicle, vehicles))
+        initial_exposed_nodes.append(count_exposed_nodes(reference_vehicle, ring.positions))
+        ring.step()
+        final_exposed_nodes.append(count_exposed_nodes(reference_vehicle, ring.positions))
+    for vehicle, position, speed in zip(vehicles, ring.positions.tolist(), ring.speeds.tolist()):
+        vehicle.position = position
+        vehicle.speed = speed
+    road[:] = ring.occupancy()
+    return initial_exposed_nodes, final_exposed_nodes
+
+def simulate_replicas(seeds, road_length, num_vehicles, time_steps, reference_position, initial_transmission_range, rigid=True, max_speed=1, slowdown_probability=0.0):
+    # run_simulation for a batch of random initial layouts, advanced together on one (replicas, num_vehicles) RingRoad;
+    # each replica draws its layout and slowdowns from its own seed, so the batching does not change the results
+    replicas = len(seeds)
+    rngs = [np.random.default_rng(seed) for seed in seeds]
+    ring = RingRoad(road_length, random_layouts(road_length, num_vehicles, replicas, rngs), 1, max_speed, slowdown_probability, rngs, rigid)
+    transmission_range = np.full((replicas, 1), float(initial_transmission_range))
+    initial_exposed_nodes = np.empty((replicas, time_steps), dtype=np.int64)
+    final_exposed_nodes = np.empty((replicas, time_steps), dtype=np.int64)
+    max_density = 0.5  # Maximum density for normalization
+    for t in range(time_steps):
+        in_range = np.abs(ring.positions - reference_position) <= transmission_range
+        if t == time_steps // 2:
+            density = in_range.mean(axis=1, keepdims=True)
+            transmission_range = adjust_transmission_range(initial_transmission_range, density, max_density)
+            in_range = np.abs(ring.positions - reference_position) <= transmission_range
+        initial_exposed_nodes[:, t] = num_vehicles - np.count_nonzero(in_range, axis=1)
+        ring.step()
+        final_exposed_nodes[:, t] = num_vehicles - np.count_nonzero(np.abs(ring.positions - reference_position) <= transmission_range, axis=1)
     return initial_exposed_nodes, final_exposed_nodes
 
+def plot_exposed_node_replicas(initial_summary, final_summary):
+    for summary, label in ((initial_summary, 'Initial Exposed Nodes'), (final_summary, 'Final Exposed Nodes')):
+        time_slots = range(len(summary.mean))
+        plt.plot(time_slots, summary.mean, label=f'{label} (mean of {summary.replicas})')
+        plt.fill_between(time_slots, summary.quantiles[0], summary.quantiles[-1], alpha=0.2)
+    plt.xlabel('Time Slots')
+    plt.ylabel('Number of Exposed Nodes')
+    plt.title('Exposed Nodes with Modified Transmission Range')
+    plt.legend()
+    plt.grid(True)
+    show_figure()
+
 def plot_exposed_nodes(initial_exposed_nodes, final_exposed_nodes):
     plt.plot(range(len(initial_exposed_nodes)), initial_exposed_nodes, label='Initial Exposed Nodes')
     plt.plot(range(len(final_exposed_nodes)), final_exposed_nodes, label='Final Exposed Nodes')
@@ -76,7 +108,7 @@ def plot_exposed_nodes(initial_exposed_nodes, final_exposed_nodes):
     plt.title('Exposed Nodes with Modified Transmission Range')
     plt.legend()
     plt.grid(True)
-    plt.show()
+    show_figure()
 
 def main():
     road_length = 100
@@ -85,7 +117,14 @@ def main():
     initial_transmission_range = 10
     power_level = 1
     time_steps = 50
+    replicas = 0  # Set above 0 to average over that many random initial layouts instead of loopa.txt
     
+    if replicas:
+        initial_exposed_nodes, final_exposed_nodes = run_replicas(simulate_replicas, replicas, chunk_size=1000, seed=0, road_length=road_length, num_vehicles=num_vehicles,
+                                                                  time_steps=time_steps, reference_position=0, initial_transmission_range=initial_transmission_range)
+        plot_exposed_node_replicas(summarise_replicas(initial_exposed_nodes), summarise_replicas(final_exposed_nodes))
+        return
+
     road = initialize_road(road_length, vehicle_density)
     reference_vehicle_position = 0  # Assuming the reference vehicle is at the beginning of the road
     reference_vehicle = Vehicle(reference_vehicle_position, 1, initial_transmission_range, power_level)
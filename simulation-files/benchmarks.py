@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from vanet.cli import STARTUP_BUDGET
+from vanet.exposure import ExposureModel
+from vanet.fcd import extract_vehicle_positions
+from vanet.neighbours import count_vehicles_within_range
+from vanet.pipeline import reduced_range_pipeline
+from vanet.runner import exposed_node_metrics, run_lane_comparison
+from vanet.spatial import GridIndex
+from vanet.synthetic import generate_fcd
+
+SIZES = (100, 1000, 10000, 100000)
+# Samples (vehicles x timesteps) per generated trace; the duration shrinks as the fleet grows
+SAMPLE_BUDGET = 500000
+LANES = (1, 2, 4)
+TRANSMISSION_RANGE = 10.0
+QUERIES = 1000
+
+
+def timed(function, repeat=1):
+    """Best wall time of ``repeat`` calls, and the result of the last call."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_size(num_vehicles, directory, max_workers, seed):
+    duration = max(5, min(100, SAMPLE_BUDGET // num_vehicles))
+    traces = {}
+    for num_lanes in LANES:
+        path = os.path.join(directory, f"synthetic-{num_vehicles}-{num_lanes}.txt")
+        generate_fcd(path, num_vehicles, num_lanes=num_lanes, duration=duration, seed=seed)
+        traces[path] = num_lanes
+    path = next(iter(traces))
+    results = []
+
+    def record(stage, seconds, **extra):
+        results.append({'vehicles': num_vehicles, 'timesteps': duration + 1, 'stage': stage, 'seconds': seconds, **extra})
+        print(f"{num_vehicles:>7} vehicles  {stage:<16} {seconds:12.6f} s")
+
+    seconds, trajectory = timed(lambda: extract_vehicle_positions(path))
+    record('parse', seconds, samples=trajectory.num_samples, bytes=os.path.getsize(path))
+
+    frame = trajectory.frame(len(trajectory.times) // 2)
+    seconds, _ = timed(lambda: GridIndex(frame.x, frame.y, TRANSMISSION_RANGE), repeat=3)
+    record('index', seconds)
+
+    rng = np.random.default_rng(seed)
+    vehicle_ids = [trajectory.vehicle_ids[vehicle] for vehicle in rng.choice(frame.vehicle, min(QUERIES, len(frame.vehicle)), replace=False)]
+    trajectory.spatial_index(len(trajectory.times) // 2, TRANSMISSION_RANGE)
+    seconds, _ = timed(lambda: [count_vehicles_within_range(trajectory, vehicle_id, frame.time, TRANSMISSION_RANGE) for vehicle_id in vehicle_ids], repeat=3)
+    record('query', seconds / len(vehicle_ids), queries=len(vehicle_ids))
+
+    seconds, _ = timed(lambda: reduced_range_pipeline(trajectory, TRANSMISSION_RANGE))
+    record('pipeline', seconds)
+
+    seconds, _ = timed(lambda: run_lane_comparison(traces.items(), exposed_node_metrics, max_workers=max_workers, transmission_range=TRANSMISSION_RANGE, exposure=ExposureModel(0.7, seed)))
+    record('lane_comparison', seconds, traces=len(traces))
+    return results
+
+
+def benchmark_startup(directory, seed, repeat=5):
+    """Wall time of a whole compute-only run on a tiny trace, i.e. interpreter and import start-up."""
+    path = os.path.join(directory, 'startup.txt')
+    generate_fcd(path, 10, duration=5, seed=seed)
+    command = [sys.executable, '-m', 'vanet', 'exposed', path]
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    subprocess.run(command, cwd=cwd, capture_output=True, check=True)
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(command, cwd=cwd, capture_output=True, text=True, check=True)
+        runs.append((time.perf_counter() - start, json.loads(completed.stdout)['startup_seconds']))
+    seconds, startup = min(runs)
+    print(f"{'':>7}          {'startup':<16} {startup:12.6f} s (whole run {seconds:.3f} s, budget {STARTUP_BUDGET} s)")
+    return {'stage': 'startup', 'seconds': startup, 'run_seconds': seconds, 'budget_seconds': STARTUP_BUDGET, 'over_budget': startup > STARTUP_BUDGET}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time parsing, indexing, queries, the reduced-range pipeline and lane comparison on synthetic traces.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="fleet sizes to benchmark")
+    parser.add_argument('--output', default='benchmark_results.jsonl', help="JSON-lines file the run is appended to")
+    parser.add_argument('--max-workers', type=int, default=None, help="worker processes for the lane comparison (0 runs in-process)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        results.append(benchmark_startup(directory, args.seed))
+        for num_vehicles in args.sizes:
+            results.extend(benchmark_size(num_vehicles, directory, args.max_workers, args.seed))
+
+    run = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processors': os.cpu_count(),
+        'results': results,
+    }
+    with open(args.output, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+    print(f"Results appended to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from vanet.render import FIGURE_DIR_ENV, FIGURE_FORMATS_ENV
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Scripts that end in a figure, relative to this directory
+FIGURE_SCRIPTS = [
+    'effi_comp_between_lanes.py',
+    'neteffi_compare_singlelane.py',
+    'throughput_singlelane.py',
+    'totexposnodes_lanecom.py',
+    'all_single_lane_files/calc.py',
+    'all_single_lane_files/calc_compare.py',
+    'all_single_lane_files/calc_density.py',
+    'all_single_lane_files/calc_dynamic_tr.py',
+    'all_single_lane_files/calc_reducedtr.py',
+    'all_single_lane_files/newexpose.py',
+    'all_single_lane_files/throughcompare.py',
+    'all_single_lane_files/throughput.py',
+]
+
+
+def render_script(script, output_dir, formats):
+    """Run one script headless in its own process, saving its figure to ``output_dir``."""
+    path = os.path.join(HERE, script)
+    env = dict(os.environ, MPLBACKEND='Agg', **{FIGURE_DIR_ENV: output_dir, FIGURE_FORMATS_ENV: ','.join(formats)})
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, path], cwd=os.path.dirname(path), env=env, capture_output=True, text=True)
+    return script, completed.returncode, time.perf_counter() - start, completed.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate every figure headless, several scripts at a time.")
+    parser.add_argument('scripts', nargs='*', default=FIGURE_SCRIPTS, help="scripts to render (default: all)")
+    parser.add_argument('--output-dir', default=os.path.join(HERE, 'figures'))
+    parser.add_argument('--formats', nargs='+', default=['png'], choices=['png', 'svg', 'pdf'])
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="scripts rendered concurrently")
+    args = parser.parse_args()
+
+    output_dir = os.path.abspath(args.output_dir)
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        for script, returncode, seconds, stderr in pool.map(lambda script: render_script(script, output_dir, args.formats), args.scripts):
+            if returncode:
+                failed += 1
+                print(f"FAILED {script} ({seconds:.1f} s)\n{stderr}")
+            else:
+                print(f"ok     {script} ({seconds:.1f} s)")
+    print(f"Figures written to {output_dir}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+
+from vanet.runner import efficiency_cell
+from vanet.sweep import parameter_grid, run_sweep
+
+def calculate_throughput(total_nodes, total_exposed_nodes):
+    if total_nodes == 0:
+        return 0
+    return (total_nodes - total_exposed_nodes) / total_nodes
+
+def main():
+    # Every combination of these values is one cell of the sweep
+    grid = parameter_grid({
+        ('path', 'num_lanes'): [('zigzagoutput.txt', 1), ('zigzagoutput2.txt', 2), ('zigzagoutput4.txt', 4)],
+        'reference_vehicle_id': ['f_0.7'],
+        'initial_transmission_range': [2.4, 2.5, 3, 4, 10],
+        'expose_percentage': [0.2, 0.7],
+        'seed': [0],
+    })
+
+    # Finished cells are kept here; rerunning an interrupted sweep only computes the missing ones
+    results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sweep_results')
+    records = run_sweep(efficiency_cell, grid, results_dir, progress=lambda done, total: print(f"{done}/{total} cells done"))
+
+    print("lanes  range  expose  efficiency_initial  efficiency_reduced")
+    for record in records:
+        params, result = record['params'], record['result']
+        efficiency_initial = calculate_throughput(result['total_nodes'], result['total_exposed_nodes_initial'])
+        efficiency_reduced = calculate_throughput(result['total_nodes'], result['total_exposed_nodes_reduced'])
+        print(f"{params['num_lanes']:5}  {params['initial_transmission_range']:5}  {params['expose_percentage']:6}  {efficiency_initial:18.4f}  {efficiency_reduced:18.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from vanet.fcd import extract_vehicle_positions
+from vanet.synthetic import generate_fcd
+
+# Bundled SUMO traces, relative to simulation-files
+BUNDLED_TRACES = ['zigzagoutput.txt', 'zigzagoutput2.txt', 'zigzagoutput4.txt']
+# Synthetic traces as (vehicles, lanes)
+SYNTHETIC_TRACES = [(40, 1), (300, 3)]
+
+
+@pytest.fixture(scope='session', params=BUNDLED_TRACES + SYNTHETIC_TRACES, ids=lambda param: param if isinstance(param, str) else 'synthetic-%dx%d' % param)
+def trace(request, tmp_path_factory):
+    """A bundled SUMO trace or a small synthetic one, parsed into a Trajectory."""
+    if isinstance(request.param, str):
+        return extract_vehicle_positions(os.path.join(HERE, '..', request.param))
+    num_vehicles, num_lanes = request.param
+    path = str(tmp_path_factory.mktemp('fcd') / 'synthetic.xml')
+    generate_fcd(path, num_vehicles, num_lanes=num_lanes, duration=10, density=0.2, seed=1)
+    return extract_vehicle_positions(path)
+
+
+def brute_force_counts(x, y, transmission_range, include_self=False):
+    """Neighbour count of every point from the full distance matrix."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    radius = np.broadcast_to(np.asarray(transmission_range, dtype=np.float64), x.shape)
+    d2 = (x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2
+    within = d2 <= np.where(radius >= 0, radius * radius, -1.0)[:, None]
+    if not include_self:
+        np.fill_diagonal(within, False)
+    return within.sum(axis=1)
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from conftest import brute_force_counts
+from vanet.batch import DENSE_LIMIT, neighbour_counts, neighbour_pairs
+
+
+@pytest.mark.parametrize('transmission_range', [0.0, 2.5, 30.0])
+def test_neighbour_counts_match_brute_force(trace, transmission_range):
+    for frame in trace.frames():
+        expected = brute_force_counts(frame.x, frame.y, transmission_range)
+        assert np.array_equal(neighbour_counts(frame.x, frame.y, transmission_range), expected)
+        assert np.array_equal(neighbour_counts(frame.x, frame.y, transmission_range, include_self=True), expected + 1)
+
+
+def test_sparse_path_matches_dense_path():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 200, DENSE_LIMIT * 2)
+    y = rng.uniform(0, 20, DENSE_LIMIT * 2)
+    radius = rng.uniform(-1, 6, len(x))
+    assert np.array_equal(neighbour_counts(x, y, radius), brute_force_counts(x, y, radius))
+    rows = rng.choice(len(x), 50, replace=False)
+    assert np.array_equal(neighbour_counts(x, y, radius, rows=rows), brute_force_counts(x, y, radius)[rows])
+
+
+def test_neighbour_pairs_are_exactly_the_in_range_pairs():
+    rng = np.random.default_rng(1)
+    x = rng.uniform(-50, 50, 400)
+    y = rng.uniform(-50, 50, 400)
+    i, j, d2 = neighbour_pairs(x, y, 7.5)
+    expected = {(a, b) for a in range(len(x)) for b in range(len(x)) if a != b and (x[a] - x[b]) ** 2 + (y[a] - y[b]) ** 2 <= 7.5 ** 2}
+    assert set(zip(i.tolist(), j.tolist())) == expected
+    assert np.allclose(d2, (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2)
+
+
+def test_neighbour_pairs_stay_inside_groups(trace):
+    group = trace.sample_frame
+    i, j, _ = neighbour_pairs(trace.x, trace.y, 5.0, group=group)
+    assert np.array_equal(group[i], group[j])
+    counts = np.bincount(i, minlength=trace.num_samples)
+    for k, frame in enumerate(trace.frames()):
+        start, stop = trace.offsets[k], trace.offsets[k + 1]
+        assert np.array_equal(counts[start:stop], brute_force_counts(frame.x, frame.y, 5.0))
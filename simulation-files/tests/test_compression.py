@@ -0,0 +1,59 @@
+import bz2
+import gzip
+import lzma
+import os
+
+import numpy as np
+import pytest
+
+from conftest import HERE
+from vanet.fcd import extract_vehicle_positions, iter_frames, trace_compression
+from vanet.trace_cache import load_cached_trajectory
+
+TRACE = os.path.join(HERE, '..', 'zigzagoutput4.txt')
+COLUMNS = ('times', 'offsets', 'vehicle', 'x', 'y')
+
+
+def assert_same_trajectory(a, b):
+    assert a.vehicle_ids == b.vehicle_ids
+    for column in COLUMNS:
+        assert np.array_equal(getattr(a, column), getattr(b, column))
+
+
+@pytest.mark.parametrize('module, suffix', [(gzip, '.gz'), (bz2, '.bz2'), (lzma, '.xz')])
+def test_compressed_traces_parse_like_plain_ones(tmp_path, module, suffix):
+    path = str(tmp_path / f"trace{suffix}")
+    with open(TRACE, 'rb') as f, module.open(path, 'wb') as out:
+        out.write(f.read())
+    assert trace_compression(path) == module.__name__
+    assert_same_trajectory(extract_vehicle_positions(path), extract_vehicle_positions(TRACE))
+    # Abandoning the read-ahead thread part way must not hang
+    frames = iter_frames(path, chunk_size=256)
+    next(frames)
+    frames.close()
+
+
+def test_zstd_trace_without_zstandard_raises_import_error(tmp_path):
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        pytest.skip('zstandard is installed')
+    path = tmp_path / 'trace.zst'
+    path.write_bytes(b'\x28\xb5\x2f\xfd' + bytes(16))
+    assert trace_compression(str(path)) == 'zstandard'
+    with pytest.raises(ImportError):
+        extract_vehicle_positions(str(path))
+
+def test_plain_traces_are_not_decompressed():
+    assert trace_compression(TRACE) is None
+
+
+def test_compressed_traces_are_cached(tmp_path):
+    path = str(tmp_path / 'trace.xml.gz')
+    with open(TRACE, 'rb') as f, gzip.open(path, 'wb') as out:
+        out.write(f.read())
+    load_cached_trajectory(path)
+    assert_same_trajectory(load_cached_trajectory(path), extract_vehicle_positions(TRACE))
+    assert len(os.listdir(tmp_path / '.trace_cache')) == 1
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from conftest import brute_force_counts
+from vanet.distance_cache import DistanceCache
+
+
+@pytest.mark.parametrize('include_self', [False, True])
+def test_count_within_matches_brute_force(trace, include_self):
+    cache = DistanceCache(trace, include_self=include_self)
+    for frame in list(trace.frames())[::4]:
+        for transmission_range in (0.0, 2.5, 30.0):
+            expected = brute_force_counts(frame.x, frame.y, transmission_range, include_self)
+            for n in range(0, len(frame.vehicle), 5):
+                vehicle_id = trace.vehicle_ids[frame.vehicle[n]]
+                assert cache.count_within(vehicle_id, frame.time, transmission_range) == expected[n]
+
+
+def test_entries_are_evicted_least_recently_used_first(trace):
+    cache = DistanceCache(trace, maxsize=2)
+    frame = trace.frame(int(np.argmax(np.diff(trace.offsets))))
+    first, second, third = (trace.vehicle_ids[vehicle] for vehicle in frame.vehicle[:3])
+    cache.sorted_distances(first, frame.time)
+    cache.sorted_distances(second, frame.time)
+    # Touching the first entry makes the second the oldest
+    cache.sorted_distances(first, frame.time)
+    cache.sorted_distances(third, frame.time)
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+    cache.sorted_distances(first, frame.time)
+    assert (cache.hits, cache.misses) == (2, 3)
+    cache.sorted_distances(second, frame.time)
+    assert (cache.hits, cache.misses) == (2, 4)
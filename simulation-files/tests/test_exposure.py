@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from vanet.exposure import ExposureModel
+
+
+def test_same_seed_gives_same_draws():
+    counts = np.arange(50)
+    assert np.array_equal(ExposureModel(0.3, seed=7).count(counts), ExposureModel(0.3, seed=7).count(counts))
+
+
+def test_substreams_are_reproducible_and_independent():
+    model = ExposureModel(0.5, seed=11)
+    counts = np.full(200, 20)
+    first = model.substream(2, 3).count(counts)
+    # Drawing from the parent in between does not shift a keyed substream
+    model.count(counts)
+    assert np.array_equal(model.substream(2, 3).count(counts), first)
+    assert not np.array_equal(model.substream(4, 3).count(counts), first)
+    assert not np.array_equal(ExposureModel(0.5, seed=12).substream(2, 3).count(counts), first)
+    assert ExposureModel(0.5).substream(2).seed is not None
+
+
+def test_paired_counts_share_draws_for_common_neighbours():
+    model = ExposureModel(0.4, seed=3)
+    rng = np.random.default_rng(0)
+    count_initial = rng.integers(0, 40, 5000)
+    count_reduced = rng.integers(0, 40, 5000)
+    exposed_initial, exposed_reduced = model.paired_counts(count_initial, count_reduced)
+    assert (exposed_initial <= count_initial).all() and (exposed_reduced <= count_reduced).all()
+    # A vehicle that sees fewer neighbours cannot have more of them exposed
+    assert (exposed_reduced[count_reduced <= count_initial] <= exposed_initial[count_reduced <= count_initial]).all()
+    assert (exposed_initial[count_initial <= count_reduced] <= exposed_reduced[count_initial <= count_reduced]).all()
+    same, _ = model.paired_counts(count_initial, count_initial)
+    assert np.array_equal(*ExposureModel(0.4, seed=3).paired_counts(count_initial, count_initial))
+    assert abs(same.mean() - 0.4 * count_initial.mean()) < 0.5
+
+
+def test_expose_percentage_is_a_probability():
+    with pytest.raises(ValueError):
+        ExposureModel(1.5)
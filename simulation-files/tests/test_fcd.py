@@ -0,0 +1,65 @@
+import os
+from xml.etree import ElementTree
+
+import numpy as np
+import pytest
+
+from conftest import HERE
+from vanet.fcd import FcdParser, extract_vehicle_positions
+
+TRACE = os.path.join(HERE, '..', 'zigzagoutput4.txt')
+
+
+def frames_of(data, chunk_size):
+    parser = FcdParser()
+    frames = []
+    for start in range(0, len(data), chunk_size):
+        frames.extend(parser.feed(data[start:start + chunk_size]))
+    frames.extend(parser.close())
+    return frames, parser
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1000, 1 << 20])
+def test_chunking_does_not_change_the_frames(chunk_size):
+    with open(TRACE, 'rb') as f:
+        data = f.read()
+    expected, _ = frames_of(data, len(data))
+    frames, parser = frames_of(data, chunk_size)
+    assert len(frames) == len(expected)
+    for frame, reference in zip(frames, expected):
+        assert frame.time == reference.time
+        assert np.array_equal(frame.vehicle, reference.vehicle)
+        assert np.array_equal(frame.x, reference.x)
+        assert np.array_equal(frame.y, reference.y)
+    assert parser.stats.malformed == 0
+
+
+def test_malformed_entries_are_skipped():
+    data = (b'<fcd-export><timestep time="0.00">'
+            b'<vehicle id="a" x="1.0" y="2.0"/>'
+            b'<vehicle x="3.0" y="4.0" id="b"/>'
+            b'<vehicle id="c" x="oops" y="4.0"/>'
+            b'<vehicle id="d" y="4.0"/>'
+            b'</timestep><vehicle id="e" x="1" y="1"/>'
+            b'<timestep time="1.00"><vehicle id="a" x="5.0" y="6.0"/></timestep></fcd-export>')
+    frames, parser = frames_of(data, 5)
+    assert [frame.time for frame in frames] == [0.0, 1.0]
+    assert [parser.vehicle_ids.names[vehicle] for vehicle in frames[0].vehicle] == ['a', 'b']
+    assert frames[0].x.tolist() == [1.0, 3.0]
+    assert frames[1].vehicle.tolist() == [0]
+    assert parser.stats.malformed == 3
+
+
+@pytest.mark.parametrize('name', ['zigzagoutput.txt', 'zigzagoutput2.txt', 'zigzagoutput4.txt'])
+def test_extract_vehicle_positions_matches_an_xml_parser(name):
+    path = os.path.join(HERE, '..', name)
+    trajectory = extract_vehicle_positions(path)
+    timesteps = list(ElementTree.parse(path).getroot().iter('timestep'))
+    frames = list(trajectory.frames())
+    assert len(frames) == len(timesteps)
+    for frame, timestep in zip(frames, timesteps):
+        vehicles = timestep.findall('vehicle')
+        assert frame.time == float(timestep.get('time'))
+        assert [trajectory.vehicle_ids[vehicle] for vehicle in frame.vehicle] == [vehicle.get('id') for vehicle in vehicles]
+        assert frame.x.tolist() == [float(vehicle.get('x')) for vehicle in vehicles]
+        assert frame.y.tolist() == [float(vehicle.get('y')) for vehicle in vehicles]
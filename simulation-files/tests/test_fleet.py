@@ -0,0 +1,14 @@
+import numpy as np
+
+from vanet.fleet import fleet_ranges
+from vanet.pipeline import reduced_range_pipeline
+
+
+def test_fleet_ranges_scatter_the_pipeline(trace):
+    fleet = fleet_ranges(trace, 2.5)
+    result = reduced_range_pipeline(trace, 2.5)
+    assert fleet.present.sum() == trace.num_samples
+    frame = trace.sample_frame
+    assert np.array_equal(fleet.count_initial[frame, trace.vehicle], result.count_initial)
+    assert np.array_equal(fleet.count_reduced[frame, trace.vehicle], result.count_reduced)
+    assert np.isnan(fleet.density[~fleet.present]).all()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from conftest import brute_force_counts
+from vanet.incremental import VerletNeighbours, track_neighbour_counts
+from vanet.trajectory import TrajectoryBuilder
+
+
+def slow_trace(num_vehicles=600, steps=25, churn=0.0, seed=0):
+    """Vehicles jittering in place on a long road, with a share of them absent at each step."""
+    rng = np.random.default_rng(seed)
+    builder = TrajectoryBuilder()
+    x = rng.uniform(0, 600, num_vehicles)
+    y = rng.uniform(0, 10, num_vehicles)
+    ids = [f"v{vehicle}" for vehicle in range(num_vehicles)]
+    for k in range(steps):
+        x = x + rng.normal(0, 0.05, num_vehicles)
+        present = rng.random(num_vehicles) >= churn
+        builder.extend(float(k), [vehicle_id for vehicle_id, here in zip(ids, present) if here], x[present], y[present])
+    return builder.build()
+
+
+def check_engine(trajectory, transmission_range, skin=None):
+    engine = VerletNeighbours(transmission_range, skin)
+    for frame in trajectory.frames():
+        engine.update(frame.vehicle, frame.x, frame.y)
+        expected = brute_force_counts(frame.x, frame.y, transmission_range)
+        assert np.array_equal(engine.counts(frame.vehicle), expected)
+        assert np.array_equal(engine.counts(frame.vehicle, include_self=True), expected + 1)
+        for n in range(0, len(frame.vehicle), 11):
+            neighbours = engine.neighbours(int(frame.vehicle[n]))
+            d2 = (frame.x - frame.x[n]) ** 2 + (frame.y - frame.y[n]) ** 2
+            in_range = frame.vehicle[(d2 <= transmission_range ** 2) & (np.arange(len(frame.x)) != n)]
+            assert sorted(neighbours.tolist()) == sorted(in_range.tolist())
+    return engine
+
+
+@pytest.mark.parametrize('skin', [None, 0.5, 5.0])
+def test_verlet_counts_match_brute_force(trace, skin):
+    check_engine(trace, 2.5, skin)
+
+
+@pytest.mark.parametrize('churn', [0.0, 0.05])
+def test_verlet_lists_survive_slow_motion_and_churn(churn):
+    engine = check_engine(slow_trace(churn=churn), 5.0)
+    assert not engine.batched
+    # The list is carried across steps rather than rebuilt every time
+    assert engine.rebuilds < 25 * 600
+
+
+def test_verlet_falls_back_to_batched_counts_for_fast_traffic(trace):
+    engine = check_engine(trace, 0.1)
+    assert engine.batched
+
+
+def test_track_neighbour_counts(trace):
+    vehicle_id = trace.vehicle_ids[len(trace.vehicle_ids) // 2]
+    vehicle = trace.vehicle_index(vehicle_id)
+    expected = []
+    for time in trace[vehicle_id].times:
+        frame = trace.frame_at(time)
+        expected.append(brute_force_counts(frame.x, frame.y, 2.5)[np.flatnonzero(frame.vehicle == vehicle)[0]])
+    assert np.array_equal(track_neighbour_counts(trace, vehicle_id, 2.5), expected)
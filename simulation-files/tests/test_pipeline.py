@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from conftest import brute_force_counts
+from vanet.pipeline import calculate_density, reduced_range_pipeline
+
+
+def brute_force_reduced_range(trajectory, transmission_range, include_self):
+    """Per-sample count, reduced range and reduced count, frame by frame from distance matrices."""
+    count_initial = np.empty(trajectory.num_samples, dtype=np.int64)
+    reduced_range = np.empty(trajectory.num_samples)
+    count_reduced = np.empty(trajectory.num_samples, dtype=np.int64)
+    for k, frame in enumerate(trajectory.frames()):
+        start, stop = trajectory.offsets[k], trajectory.offsets[k + 1]
+        counts = brute_force_counts(frame.x, frame.y, transmission_range, include_self)
+        ranges = transmission_range * (1 - calculate_density(counts, transmission_range))
+        count_initial[start:stop] = counts
+        reduced_range[start:stop] = ranges
+        count_reduced[start:stop] = brute_force_counts(frame.x, frame.y, ranges, include_self)
+    return count_initial, reduced_range, count_reduced
+
+
+@pytest.mark.parametrize('single_lane', [False, True])
+@pytest.mark.parametrize('include_self', [False, True])
+@pytest.mark.parametrize('window_samples', [1 << 18, 50])
+def test_reduced_range_pipeline_matches_brute_force(trace, single_lane, include_self, window_samples):
+    count_initial, reduced_range, count_reduced = brute_force_reduced_range(trace, 2.5, include_self)
+    result = reduced_range_pipeline(trace, 2.5, include_self=include_self, single_lane=single_lane, window_samples=window_samples)
+    assert np.array_equal(result.rows, np.arange(trace.num_samples))
+    assert np.array_equal(result.count_initial, count_initial)
+    assert np.allclose(result.reduced_range, reduced_range)
+    assert np.array_equal(result.count_reduced, count_reduced)
+    assert np.array_equal(result.times, trace.times[trace.sample_frame])
+
+
+def test_reduced_range_pipeline_selects_vehicles(trace):
+    vehicle_ids = trace.vehicle_ids[::3]
+    full = reduced_range_pipeline(trace, 2.5)
+    result = reduced_range_pipeline(trace, 2.5, vehicle_ids=vehicle_ids)
+    rows = np.flatnonzero(np.isin(trace.vehicle, [trace.vehicle_index(vehicle_id) for vehicle_id in vehicle_ids]))
+    assert np.array_equal(result.rows, rows)
+    assert np.array_equal(result.count_initial, full.count_initial[rows])
+    assert np.array_equal(result.count_reduced, full.count_reduced[rows])
+    track = trace[vehicle_ids[0]]
+    assert np.array_equal(result.times[result.vehicle == trace.vehicle_index(vehicle_ids[0])], track.times)
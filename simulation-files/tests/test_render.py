@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from vanet.render import lttb
+
+
+def reference_lttb(x, y, threshold):
+    """Straightforward per-point LTTB over the same integer bucket edges."""
+    n = len(x)
+    edges = [bucket * (n - 2) // (threshold - 2) + 1 for bucket in range(threshold - 1)]
+    keep = [0]
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        mean_x = np.mean(x[stop:next_stop])
+        mean_y = np.mean(y[stop:next_stop])
+        a = keep[-1]
+        best, best_area = start, -1.0
+        for point in range(start, stop):
+            area = abs((x[a] - mean_x) * (y[point] - y[a]) - (x[a] - x[point]) * (mean_y - y[a]))
+            if area > best_area:
+                best, best_area = point, area
+        keep.append(best)
+    keep.append(n - 1)
+    return x[keep], y[keep]
+
+
+@pytest.mark.parametrize('n, threshold', [(10, 3), (100, 7), (1000, 100), (1001, 999), (5000, 64)])
+def test_lttb_matches_reference(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.1, 1, n))
+    y = rng.normal(size=n).cumsum()
+    xs, ys = lttb(x, y, threshold)
+    expected_x, expected_y = reference_lttb(x, y, threshold)
+    assert len(xs) == threshold
+    assert np.array_equal(xs, expected_x)
+    assert np.array_equal(ys, expected_y)
+    assert xs[0] == x[0] and xs[-1] == x[-1]
+    assert (np.diff(xs) > 0).all()
+
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(10000, dtype=np.float64)
+    y = np.zeros(10000)
+    y[4321] = 100.0
+    xs, ys = lttb(x, y, 50)
+    assert 100.0 in ys
+
+
+@pytest.mark.parametrize('threshold', [0, 2, 10, 11])
+def test_lttb_leaves_short_series_alone(threshold):
+    x = np.arange(10.0)
+    xs, ys = lttb(x, x * 2, threshold)
+    assert np.array_equal(xs, x) and np.array_equal(ys, x * 2)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from vanet.replicas import run_replicas, summarise_replicas
+from vanet.ringroad import RingRoad, random_layouts
+
+
+def simulate(seeds, length, num_vehicles, time_steps):
+    rngs = [np.random.default_rng(seed) for seed in seeds]
+    ring = RingRoad(length, random_layouts(length, num_vehicles, len(seeds), rngs), max_speed=3, slowdown_probability=0.3, seed=rngs)
+    speeds = np.empty((len(seeds), time_steps))
+    for t in range(time_steps):
+        ring.step()
+        speeds[:, t] = ring.speeds.mean(axis=1)
+    return speeds, ring.positions
+
+
+@pytest.mark.parametrize('chunk_size, max_workers', [(1, 0), (3, 0), (7, 0), (4, 2)])
+def test_replicas_do_not_depend_on_chunking(chunk_size, max_workers):
+    params = dict(length=60, num_vehicles=15, time_steps=20)
+    speeds, positions = run_replicas(simulate, 10, seed=5, **params)
+    chunked_speeds, chunked_positions = run_replicas(simulate, 10, chunk_size=chunk_size, max_workers=max_workers, seed=5, **params)
+    assert speeds.shape == (10, 20) and positions.shape == (10, 15)
+    assert np.array_equal(chunked_speeds, speeds)
+    assert np.array_equal(chunked_positions, positions)
+    # Replicas are distinct draws, and the seed reproduces them
+    assert len(np.unique(positions, axis=0)) == 10
+    assert not np.array_equal(run_replicas(simulate, 10, seed=6, **params)[0], speeds)
+
+
+def test_batched_replica_matches_a_lone_run():
+    seeds = np.random.SeedSequence(1).spawn(4)
+    speeds, positions = simulate(seeds, 60, 15, 20)
+    alone_speeds, alone_positions = simulate(seeds[2:3], 60, 15, 20)
+    assert np.array_equal(alone_speeds[0], speeds[2])
+    assert np.array_equal(alone_positions[0], positions[2])
+
+
+def test_summarise_replicas():
+    samples = np.random.default_rng(0).normal(size=(200, 3))
+    summary = summarise_replicas(samples, levels=(0.1, 0.9))
+    assert np.allclose(summary.mean, samples.mean(axis=0))
+    assert np.allclose(summary.variance, samples.var(axis=0, ddof=1))
+    assert summary.quantiles.shape == (2, 3) and summary.replicas == 200
+    assert np.array_equal(summarise_replicas(samples[:1]).variance, np.zeros(3))
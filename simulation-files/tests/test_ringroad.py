@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from vanet.ringroad import RingRoad, random_layouts, ring_range_counts
+
+
+def reference_nasch_step(road, max_speed):
+    """One deterministic Nagel-Schreckenberg step on a cell array holding each vehicle's speed, -1 for empty."""
+    length = len(road)
+    moved = np.full(length, -1)
+    for cell in np.flatnonzero(road >= 0):
+        gap = 0
+        while gap < length - 1 and road[(cell + gap + 1) % length] < 0:
+            gap += 1
+        speed = min(road[cell] + 1, max_speed, gap)
+        moved[(cell + speed) % length] = speed
+    return moved
+
+
+@pytest.mark.parametrize('num_vehicles', [1, 10, 45, 50])
+def test_nasch_matches_a_cell_by_cell_reference(num_vehicles):
+    rng = np.random.default_rng(num_vehicles)
+    positions = rng.choice(50, num_vehicles, replace=False)
+    ring = RingRoad(50, positions, max_speed=4)
+    road = np.full(50, -1)
+    road[positions] = 0
+    for _ in range(40):
+        ring.step()
+        road = reference_nasch_step(road, 4)
+        assert np.array_equal(np.flatnonzero(ring.occupancy()), np.flatnonzero(road >= 0))
+        assert np.array_equal(road[ring.positions], ring.speeds)
+
+
+def test_replicas_advance_like_separate_roads():
+    layouts = random_layouts(80, 20, 5, np.random.default_rng(6))
+    ring = RingRoad(80, layouts, max_speed=3)
+    roads = [RingRoad(80, layout, max_speed=3) for layout in layouts]
+    for _ in range(30):
+        ring.step()
+        for road in roads:
+            road.step()
+    assert np.array_equal(ring.positions, [road.positions for road in roads])
+
+
+def test_nasch_never_collides_and_keeps_vehicles():
+    layouts = random_layouts(200, 60, 8, np.random.default_rng(2))
+    ring = RingRoad(200, layouts, max_speed=5, slowdown_probability=0.3, seed=3)
+    for _ in range(100):
+        ring.step()
+        assert (ring.gaps() >= 0).all()
+        assert (ring.occupancy().sum(axis=-1) == 60).all()
+        assert ((ring.speeds >= 0) & (ring.speeds <= 5)).all()
+
+
+def test_rigid_mode_moves_every_vehicle_by_its_speed():
+    positions = np.array([0, 1, 2, 50, 98])
+    speeds = np.array([1, 3, 1, 2, 4])
+    ring = RingRoad(100, positions, speeds, rigid=True)
+    for step in range(1, 30):
+        ring.step()
+        assert np.array_equal(ring.positions, (positions + step * speeds) % 100)
+        assert np.array_equal(ring.speeds, speeds)
+
+
+def test_cells_hold_one_vehicle():
+    with pytest.raises(ValueError):
+        RingRoad(10, [1, 1])
+
+
+def brute_force_ring_counts(road, positions, transmission_range):
+    length = len(road)
+    cells = np.flatnonzero(road)
+    counts = []
+    for position, reach in zip(positions, np.broadcast_to(transmission_range, np.shape(positions))):
+        distance = np.abs(cells - position)
+        distance = np.minimum(distance, length - distance)
+        counts.append(int(np.count_nonzero(distance <= np.floor(reach))) if reach >= 0 else 0)
+    return np.array(counts)
+
+
+@pytest.mark.parametrize('transmission_range', [0, 1, 2.5, 7, 49, 60])
+def test_ring_range_counts_match_brute_force(transmission_range):
+    rng = np.random.default_rng(0)
+    road = (rng.random(100) < 0.3).astype(np.int8)
+    positions = rng.integers(0, 100, 40)
+    assert np.array_equal(ring_range_counts(road, positions, transmission_range), brute_force_ring_counts(road, positions, transmission_range))
+
+
+def test_ring_range_counts_per_position_ranges_and_replicas():
+    rng = np.random.default_rng(1)
+    roads = (rng.random((4, 50)) < 0.4).astype(np.int8)
+    positions = rng.integers(0, 50, (4, 10))
+    ranges = rng.integers(0, 30, (4, 10))
+    counts = ring_range_counts(roads, positions, ranges)
+    for replica in range(4):
+        assert np.array_equal(counts[replica], brute_force_ring_counts(roads[replica], positions[replica], ranges[replica]))
+
+
+def test_range_counts_match_brute_force():
+    ring = RingRoad(100, np.random.default_rng(4).choice(100, 30, replace=False), max_speed=3, seed=5)
+    ring.run(10)
+    expected = brute_force_ring_counts(ring.occupancy(), ring.positions, 6) - 1
+    assert np.array_equal(ring.range_counts(6), expected)
+    assert np.array_equal(ring.exposed_counts(6), len(ring) - 1 - expected)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from vanet.rsu import rsu_cell_size, rsu_density_pipeline
+
+
+def brute_force_cell_counts(trajectory, cell_size, origin):
+    """Vehicles sharing each sample's RSU cell, frame by frame and cell by cell."""
+    counts = np.empty(trajectory.num_samples, dtype=np.int64)
+    for k, frame in enumerate(trajectory.frames()):
+        cells = [(int(np.floor((x - origin[0]) / cell_size)), int(np.floor((y - origin[1]) / cell_size))) for x, y in zip(frame.x, frame.y)]
+        for n, cell in enumerate(cells):
+            counts[trajectory.offsets[k] + n] = cells.count(cell)
+    return counts
+
+
+@pytest.mark.parametrize('window_samples', [1 << 18, 1])
+@pytest.mark.parametrize('cell_size', [None, 1.0, 25.0])
+def test_cell_counts_match_brute_force(trace, cell_size, window_samples):
+    result = rsu_density_pipeline(trace, 2.5, cell_size=cell_size, window_samples=window_samples)
+    size = cell_size or rsu_cell_size(2.5)
+    expected = brute_force_cell_counts(trace, size, (trace.x.min(), trace.y.min()))
+    assert np.array_equal(result.rows, np.arange(trace.num_samples))
+    assert np.array_equal(result.cell_count, expected)
+    assert np.allclose(result.density, (expected - 1) / size ** 2)
+    included = rsu_density_pipeline(trace, 2.5, cell_size=cell_size, include_self=True)
+    assert np.allclose(included.density, expected / size ** 2)
+
+
+def test_origin_inside_the_trace_and_vehicle_selection(trace):
+    origin = (float(np.median(trace.x)), float(np.median(trace.y)))
+    vehicle_ids = trace.vehicle_ids[::2]
+    result = rsu_density_pipeline(trace, 2.5, cell_size=3.0, origin=origin, vehicle_ids=vehicle_ids)
+    rows = np.flatnonzero(np.isin(trace.vehicle, [trace.vehicle_index(vehicle_id) for vehicle_id in vehicle_ids]))
+    assert np.array_equal(result.rows, rows)
+    assert np.array_equal(result.cell_count, brute_force_cell_counts(trace, 3.0, origin)[rows])
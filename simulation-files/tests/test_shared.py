@@ -0,0 +1,63 @@
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from vanet.shared import SharedTrajectory, attach, run_shared
+
+
+def shm_segments():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+def track_of(trajectory, vehicle_id):
+    track = trajectory[vehicle_id]
+    # A worker's per-vehicle index should be the shared read-only one, not a fresh argsort
+    own_index = trajectory.vehicle_order.flags.writeable or trajectory.vehicle_offsets.flags.writeable
+    return track.times.tolist(), track.x.tolist(), own_index
+
+
+def test_attach_gives_the_same_trajectory_without_copies(trace):
+    with SharedTrajectory(trace) as shared:
+        attached = attach(shared.handle)
+        assert attach(shared.handle) is attached
+        assert attached.vehicle_ids == trace.vehicle_ids
+        for column in ('times', 'offsets', 'vehicle', 'x', 'y', 'vehicle_order', 'vehicle_offsets', 'sample_frame'):
+            assert np.array_equal(getattr(attached, column), getattr(trace, column))
+            assert not getattr(attached, column).flags.writeable
+        vehicle_id = trace.vehicle_ids[-1]
+        assert track_of(attached, vehicle_id) == (trace[vehicle_id].times.tolist(), trace[vehicle_id].x.tolist(), False)
+
+
+@pytest.mark.parametrize('max_workers', [0, 2])
+def test_run_shared_returns_results_in_task_order_and_removes_segments(trace, max_workers):
+    before = shm_segments()
+    vehicle_ids = trace.vehicle_ids[:6]
+    results = run_shared(track_of, trace, [{'vehicle_id': vehicle_id} for vehicle_id in vehicle_ids], max_workers=max_workers)
+    for vehicle_id, (times, x, own_index) in zip(vehicle_ids, results):
+        assert times == trace[vehicle_id].times.tolist()
+        assert x == trace[vehicle_id].x.tolist()
+        assert own_index == (max_workers == 0)
+    assert shm_segments() == before
+
+
+def test_segments_are_unlinked_on_close(trace):
+    shared = SharedTrajectory(trace)
+    names = [shared.handle.vehicle_ids[0]] + [name for name, _, _ in shared.handle.columns]
+    shared.close()
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_failed_publish_leaves_no_segments(trace, monkeypatch):
+    class Unpublishable:
+        def __array__(self, *args, **kwargs):
+            raise RuntimeError('cannot publish')
+
+    before = shm_segments()
+    monkeypatch.setattr(trace, 'y', Unpublishable())
+    with pytest.raises(RuntimeError):
+        SharedTrajectory(trace)
+    assert shm_segments() == before
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from vanet import trajectory as trajectory_module
+from vanet.spatial import GridIndex
+from vanet.trajectory import TrajectoryBuilder
+
+
+@pytest.mark.parametrize('cell_size', [0.5, 2.5, 40.0])
+def test_grid_index_query_matches_brute_force(trace, cell_size):
+    for frame in list(trace.frames())[::5]:
+        grid = GridIndex(frame.x, frame.y, cell_size)
+        for n in range(0, len(frame.x), 7):
+            for radius in (0.0, 2.5, 12.0):
+                d2 = (frame.x - frame.x[n]) ** 2 + (frame.y - frame.y[n]) ** 2
+                assert sorted(grid.query(frame.x[n], frame.y[n], radius).tolist()) == np.flatnonzero(d2 <= radius * radius).tolist()
+
+
+def test_grid_index_rejects_bad_cell_size():
+    with pytest.raises(ValueError):
+        GridIndex([0.0], [0.0], 0)
+
+
+def test_frame_grids_are_bounded_and_reused(monkeypatch):
+    monkeypatch.setattr(trajectory_module, 'GRID_CACHE_SIZE', 3)
+    trajectory = TrajectoryBuilder()
+    for k in range(5):
+        trajectory.extend(float(k), ['a', 'b'], [k, k + 1.0], [0.0, 0.0])
+    trajectory = trajectory.build()
+    first = trajectory.spatial_index(0, 2.5)
+    assert trajectory.spatial_index(0, 2.5) is first
+    for k in range(1, 5):
+        trajectory.spatial_index(k, 2.5)
+    assert len(trajectory._grids) == 3
+    assert trajectory.spatial_index(0, 2.5) is not first
@@ -0,0 +1,79 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from conftest import HERE, brute_force_counts
+from vanet.pipeline import calculate_density, dynamic_transmission_range
+from vanet.stream import DensityController, read_pipe, stream_ranges
+
+TRACE = os.path.join(HERE, '..', 'zigzagoutput4.txt')
+
+
+def chunks_of(path, chunk_size):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+@pytest.mark.parametrize('block_size', [1, 7, 1024])
+def test_every_frame_is_ranged_like_brute_force(trace, incremental, block_size):
+    controller = DensityController(2.5, latency_budget=float('inf'), incremental=incremental, block_size=block_size)
+    for frame in trace.frames():
+        step = controller.step(frame, trace.vehicle_ids)
+        density = calculate_density(brute_force_counts(frame.x, frame.y, 2.5), 2.5)
+        assert step.time == frame.time
+        assert step.vehicle_ids == [trace.vehicle_ids[vehicle] for vehicle in frame.vehicle]
+        assert np.allclose(step.density, density)
+        assert np.allclose(step.transmission_range, dynamic_transmission_range(density, 2.5))
+        assert not step.stale.any()
+
+
+def test_stream_emits_one_step_per_timestep_whatever_the_chunking():
+    expected = list(stream_ranges(chunks_of(TRACE, 1 << 30), DensityController(2.5)))
+    steps = list(stream_ranges(chunks_of(TRACE, 97), DensityController(2.5)))
+    assert [step.time for step in steps] == [step.time for step in expected]
+    for step, reference in zip(steps, expected):
+        assert step.vehicle_ids == reference.vehicle_ids
+        assert np.array_equal(step.transmission_range, reference.transmission_range)
+
+
+def test_read_pipe_yields_everything():
+    read_fd, write_fd = os.pipe()
+    with open(TRACE, 'rb') as f:
+        data = f.read(50000)
+    os.write(write_fd, data)
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as pipe:
+        assert b''.join(read_pipe(pipe, chunk_size=4096)) == data
+
+
+def test_latency_counts_the_wait_behind_earlier_frames():
+    controller = DensityController(2.5, latency_budget=1.0)
+    steps = []
+    for step in stream_ranges(chunks_of(TRACE, 1 << 30), controller):
+        steps.append(step)
+        time.sleep(0.002)
+    # Every frame came in the one chunk, so the last one waited for all the others
+    assert steps[-1].latency >= 0.002 * (len(steps) - 1)
+    assert [step.latency for step in steps] == sorted(step.latency for step in steps)
+
+
+@pytest.mark.parametrize('incremental', [False, True])
+def test_blocks_past_the_budget_keep_their_previous_range(trace, incremental):
+    controller = DensityController(2.5, latency_budget=0.0, incremental=incremental, block_size=2)
+    previous = {}
+    for frame in trace.frames():
+        step = controller.step(frame, trace.vehicle_ids)
+        # The first block is always ranged, the rest are out of budget
+        assert (~step.stale).sum() == min(2, len(frame.vehicle))
+        for vehicle_id, transmission_range, stale in zip(step.vehicle_ids, step.transmission_range, step.stale):
+            if stale:
+                assert transmission_range == previous.get(vehicle_id, 2.5)
+            previous[vehicle_id] = transmission_range
+    assert controller.latency_report()['overruns'] == len(trace.times)
@@ -0,0 +1,89 @@
+import os
+import shutil
+import sys
+import time
+
+import pytest
+
+from conftest import HERE
+from vanet.sweep import ResultsStore, parameter_grid, run_sweep
+
+TRACE = os.path.join(HERE, '..', 'zigzagoutput4.txt')
+
+# Cells evaluated in this process, and the scale at which the next sweep is interrupted
+evaluated = []
+interrupt_at = None
+
+
+def scaled_samples(trajectory, scale):
+    if scale == interrupt_at:
+        raise KeyboardInterrupt
+    evaluated.append(scale)
+    return trajectory.num_samples * scale
+
+
+def worker_pid(trajectory, cell):
+    time.sleep(0.1)
+    return os.getpid()
+
+
+@pytest.fixture
+def trace_copy(tmp_path):
+    path = str(tmp_path / 'trace.xml')
+    shutil.copy(TRACE, path)
+    evaluated.clear()
+    return path
+
+
+def test_parameter_grid():
+    grid = parameter_grid({('path', 'num_lanes'): [('a', 1), ('b', 2)], 'range': [2.5, 10]})
+    assert grid == [
+        {'path': 'a', 'num_lanes': 1, 'range': 2.5},
+        {'path': 'a', 'num_lanes': 1, 'range': 10},
+        {'path': 'b', 'num_lanes': 2, 'range': 2.5},
+        {'path': 'b', 'num_lanes': 2, 'range': 10},
+    ]
+
+
+def test_interrupted_sweep_resumes(trace_copy, tmp_path, monkeypatch):
+    store = str(tmp_path / 'results')
+    grid = parameter_grid({'path': [trace_copy], 'scale': [1, 2, 3, 4, 5]})
+    monkeypatch.setattr(sys.modules[__name__], 'interrupt_at', 4)
+    with pytest.raises(KeyboardInterrupt):
+        run_sweep(scaled_samples, grid, store, max_workers=0, cells_per_task=1)
+    assert evaluated == [1, 2, 3]
+
+    # Finished cells are kept and a rerun computes only the rest
+    monkeypatch.setattr(sys.modules[__name__], 'interrupt_at', None)
+    evaluated.clear()
+    records = run_sweep(scaled_samples, grid, store, max_workers=0)
+    assert evaluated == [4, 5]
+    assert [record['result'] for record in records] == [1395 * scale for scale in range(1, 6)]
+    assert len(list(ResultsStore(store))) == 5
+    evaluated.clear()
+    run_sweep(scaled_samples, grid, store, max_workers=0)
+    assert evaluated == []
+
+
+def test_regenerated_trace_invalidates_its_cells(trace_copy, tmp_path):
+    store = str(tmp_path / 'results')
+    grid = parameter_grid({'path': [trace_copy], 'scale': [1, 2]})
+    assert [record['result'] for record in run_sweep(scaled_samples, grid, store, max_workers=0)] == [1395, 2790]
+
+    # Keep only the first two timesteps
+    with open(trace_copy) as f:
+        text = f.read()
+    cut = text.index('<timestep', text.index('<timestep', text.index('<timestep') + 1) + 1)
+    with open(trace_copy, 'w') as f:
+        f.write(text[:cut] + '</fcd-export>\n')
+    evaluated.clear()
+    records = run_sweep(scaled_samples, grid, store, max_workers=0)
+    assert evaluated == [1, 2]
+    assert records[0]['result'] < 1395 and records[1]['result'] == 2 * records[0]['result']
+    assert len(list(ResultsStore(store))) == 4
+
+
+def test_cells_of_one_trace_are_spread_over_workers(trace_copy, tmp_path):
+    grid = parameter_grid({'path': [trace_copy], 'cell': list(range(8))})
+    records = run_sweep(worker_pid, grid, str(tmp_path / 'results'), max_workers=4)
+    assert len({record['result'] for record in records}) > 1
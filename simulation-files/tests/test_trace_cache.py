@@ -0,0 +1,68 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+from conftest import HERE
+from vanet import trace_cache
+from vanet.fcd import extract_vehicle_positions
+from vanet.trace_cache import cache_path, load_cached_trajectory
+
+TRACE = os.path.join(HERE, '..', 'zigzagoutput4.txt')
+COLUMNS = ('times', 'offsets', 'vehicle', 'x', 'y')
+
+
+def assert_same_trajectory(a, b):
+    assert a.vehicle_ids == b.vehicle_ids
+    for column in COLUMNS:
+        assert np.array_equal(getattr(a, column), getattr(b, column))
+
+
+def test_trace_cache_round_trip_and_repair(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    expected = extract_vehicle_positions(TRACE)
+    assert_same_trajectory(load_cached_trajectory(TRACE, cache_dir), expected)
+    cached = load_cached_trajectory(TRACE, cache_dir)
+    assert_same_trajectory(cached, expected)
+    assert not cached.x.flags.writeable
+    assert np.array_equal(cached.vehicle_order, np.argsort(expected.vehicle, kind='stable'))
+
+    directory = cache_path(TRACE, cache_dir)
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump({'version': 0, 'vehicle_ids': []}, f)
+    assert_same_trajectory(load_cached_trajectory(TRACE, cache_dir), expected)
+    with open(os.path.join(directory, 'x.npy'), 'wb') as f:
+        f.write(b'garbage')
+    assert_same_trajectory(load_cached_trajectory(TRACE, cache_dir), expected)
+    np.save(os.path.join(directory, 'y.npy'), expected.y[:-1])
+    assert_same_trajectory(load_cached_trajectory(TRACE, cache_dir), expected)
+    assert sorted(os.listdir(cache_dir)) == [os.path.basename(directory)]
+
+
+def test_stale_entries_are_removed(tmp_path):
+    path = str(tmp_path / 'trace.xml')
+    shutil.copy(TRACE, path)
+    cache_dir = str(tmp_path / 'cache')
+    first = cache_path(path, cache_dir)
+    load_cached_trajectory(path, cache_dir)
+    load_cached_trajectory(path, cache_dir, dtype=np.float32)
+    # Entries of other traces and of other cache versions
+    os.makedirs(cache_path(TRACE, cache_dir))
+    os.makedirs(first.replace(f"-v{trace_cache.FORMAT_VERSION}-", '-v1-'))
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache_path(path, cache_dir) != first
+    assert_same_trajectory(load_cached_trajectory(path, cache_dir), extract_vehicle_positions(TRACE))
+    assert sorted(os.listdir(cache_dir)) == sorted(os.path.basename(entry) for entry in (cache_path(path, cache_dir), cache_path(TRACE, cache_dir)))
+
+
+def test_unwritable_cache_falls_back_to_parsing(tmp_path, monkeypatch, capsys):
+    def read_only(trajectory, directory):
+        raise PermissionError(13, 'Permission denied', directory)
+
+    monkeypatch.setattr(trace_cache, 'save_trajectory', read_only)
+    trajectory = load_cached_trajectory(TRACE, str(tmp_path / 'cache'))
+    assert_same_trajectory(trajectory, extract_vehicle_positions(TRACE))
+    assert 'Could not write trace cache' in capsys.readouterr().out
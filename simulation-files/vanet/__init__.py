@@ -0,0 +1,27 @@
+"""Shared trace handling for the VANET exposed-node simulations."""
+
+import importlib
+
+# Names re-exported from submodules, imported on first access so that
+# ``import vanet`` stays cheap and NumPy loads only when it is needed
+_EXPORTS = {
+    'Frame': 'trajectory',
+    'Trajectory': 'trajectory',
+    'TrajectoryBuilder': 'trajectory',
+    'VehicleIds': 'trajectory',
+    'VehicleTrack': 'trajectory',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,82 @@
+import numpy as np
+
+# Rows of the dense distance matrix computed at a time (BLOCK_SIZE x N float64 per block)
+BLOCK_SIZE = 1024
+# Above this many vehicles in a frame the sparse grid neighbour list is used instead
+DENSE_LIMIT = 512
+
+
+def neighbour_counts(x, y, transmission_range, include_self=False, rows=None, block_size=BLOCK_SIZE):
+    """In-range neighbour count of every vehicle in one frame.
+
+    ``transmission_range`` may be a scalar or one range per vehicle. ``rows``
+    restricts the query vehicles to a subset of the frame (counts are still
+    taken against every vehicle). Small frames use blocked dense distance
+    matrices, large ones a sparse neighbour list.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    rows = np.arange(len(x)) if rows is None else np.asarray(rows, dtype=np.int64)
+    radius = np.broadcast_to(np.asarray(transmission_range, dtype=np.float64), x.shape)
+    if len(x) > DENSE_LIMIT:
+        i, _, _ = neighbour_pairs(x, y, radius)
+        counts = np.bincount(i, minlength=len(x))[rows]
+        if include_self:
+            counts = counts + (radius[rows] >= 0)
+        return counts
+    radius2 = np.where(radius >= 0, radius * radius, -1.0)
+    counts = np.empty(len(rows), dtype=np.int64)
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        dx = x[block, None] - x[None, :]
+        dy = y[block, None] - y[None, :]
+        counts[start:start + block_size] = np.count_nonzero(dx * dx + dy * dy <= radius2[block, None], axis=1)
+    if not include_self:
+        counts -= radius[rows] >= 0
+    return counts
+
+
+def neighbour_pairs(x, y, transmission_range, cell_size=None, group=None):
+    """Sparse neighbour list: every ordered pair (i, j), i != j, with j within range of i.
+
+    Returns ``(i, j, d2)`` with squared distances. With per-vehicle ranges the
+    range of i applies. Candidates come from the 3x3 block of grid cells around
+    each vehicle, with cells as large as the largest range. ``group`` (e.g. the
+    frame index of each sample) keeps pairs inside the same group, so many
+    frames can be processed in one call.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    radius = np.broadcast_to(np.asarray(transmission_range, dtype=np.float64), x.shape)
+    empty = np.empty(0, dtype=np.int64)
+    if not len(x) or radius.max() < 0:
+        return empty, empty, np.empty(0)
+    cell_size = cell_size or max(float(radius.max()), 1e-9)
+    cx = np.floor(x / cell_size).astype(np.int64)
+    cy = np.floor(y / cell_size).astype(np.int64)
+    cx -= cx.min() - 1
+    cy -= cy.min() - 1
+    if group is not None:
+        # Leave an empty column between groups so the dx = +-1 columns never cross over
+        cx += np.asarray(group, dtype=np.int64) * (int(cx.max()) + 2)
+    stride = int(cy.max()) + 2
+    keys = cx * stride + cy
+    order = np.argsort(keys, kind='stable')
+    keys_sorted = keys[order]
+
+    pieces_i, pieces_j = [], []
+    for dx in (-1, 0, 1):
+        # The three cells of one neighbouring column are contiguous in key order
+        column = (cx + dx) * stride + cy
+        starts = np.searchsorted(keys_sorted, column - 1, side='left')
+        stops = np.searchsorted(keys_sorted, column + 1, side='right')
+        lengths = stops - starts
+        i = np.repeat(np.arange(len(x)), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        pieces_i.append(i)
+        pieces_j.append(order[np.repeat(starts, lengths) + offsets])
+    i = np.concatenate(pieces_i)
+    j = np.concatenate(pieces_j)
+    d2 = (x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2
+    keep = (i != j) & (d2 <= np.where(radius >= 0, radius * radius, -1.0)[i])
+    return i[keep], j[keep], d2[keep]
@@ -0,0 +1,170 @@
+"""Compute-only entry point: ``python -m vanet <command> TRACE ...`` prints JSON and never imports matplotlib."""
+import argparse
+import json
+import sys
+import time
+
+_STARTED = time.perf_counter()
+
+# Seconds from interpreter start-up to the first computation that a small batch job should stay within
+STARTUP_BUDGET = 0.25
+
+
+def _reduced_range(args, trajectory):
+    from .pipeline import reduced_range_pipeline
+
+    vehicle_ids = [args.vehicle] if args.vehicle else None
+    result = reduced_range_pipeline(trajectory, args.range, vehicle_ids=vehicle_ids, single_lane=args.single_lane)
+    if args.vehicle:
+        return {field: getattr(result, field).tolist() for field in ('times', 'count_initial', 'density', 'reduced_range', 'count_reduced')}
+    return {
+        'samples': len(result.rows),
+        'mean_count_initial': float(result.count_initial.mean()) if len(result.rows) else 0.0,
+        'mean_density': float(result.density.mean()) if len(result.rows) else 0.0,
+        'mean_reduced_range': float(result.reduced_range.mean()) if len(result.rows) else 0.0,
+        'mean_count_reduced': float(result.count_reduced.mean()) if len(result.rows) else 0.0,
+    }
+
+
+def _efficiency(args, trajectory):
+    from .runner import efficiency_cell
+
+    return efficiency_cell(trajectory, args.lanes, args.vehicle, args.range, args.expose, args.seed)
+
+
+def _fleet(args, trajectory):
+    from .exposure import ExposureModel
+    from .runner import fleet_efficiency_metrics
+
+    return fleet_efficiency_metrics(trajectory, args.lanes, args.range, ExposureModel(args.expose, args.seed))
+
+
+def _exposed(args, trajectory):
+    from .exposure import ExposureModel
+    from .runner import exposed_node_metrics
+
+    return exposed_node_metrics(trajectory, args.lanes, args.range, ExposureModel(args.expose, args.seed))
+
+
+def _rsu(args, trajectory):
+    import math
+
+    from .rsu import compare_rsu_ranges
+
+    vehicle_ids = [args.vehicle] if args.vehicle else None
+    comparison = compare_rsu_ranges(trajectory, args.range, cell_size=args.cell_size, vehicle_ids=vehicle_ids, single_lane=args.single_lane)
+    return {
+        'samples': len(comparison.rsu_range),
+        'mean_rsu_range': float(comparison.rsu_range.mean()) if len(comparison.rsu_range) else 0.0,
+        'mean_per_vehicle_range': float(comparison.per_vehicle_range.mean()) if len(comparison.per_vehicle_range) else 0.0,
+        'mean_abs_error': comparison.mean_abs_error,
+        'bias': comparison.bias,
+        'rmse': comparison.rmse,
+        'correlation': None if math.isnan(comparison.correlation) else comparison.correlation,
+    }
+
+
+def _stream(args):
+    from .stream import DensityController, follow_file, read_pipe, read_socket, stream_ranges
+
+    if args.follow:
+        chunks = follow_file(args.follow, idle_timeout=args.idle_timeout)
+    elif args.socket:
+        host, _, port = args.socket.rpartition(':')
+        chunks = read_socket((host, int(port)) if host and port.isdigit() else args.socket)
+    else:
+        chunks = read_pipe(sys.stdin.buffer)
+    controller = DensityController(args.range, latency_budget=args.budget, incremental=args.incremental)
+    for step in stream_ranges(chunks, controller):
+        record = {'time': step.time, 'vehicles': len(step.vehicle_ids), 'stale': int(step.stale.sum()), 'latency': step.latency}
+        if args.ranges:
+            record['ranges'] = dict(zip(step.vehicle_ids, step.transmission_range.tolist()))
+        print(json.dumps(record), flush=True)
+    return controller.latency_report()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m vanet', description="Compute VANET metrics for an FCD trace and print them as JSON.")
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET, help="warn when start-up (interpreter and imports) takes longer than this many seconds")
+    parser.add_argument('--no-cache', action='store_true', help="parse the trace directly instead of using the binary trace cache")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    reduced = commands.add_parser('reduced-range', help="neighbour count, density and reduced range")
+    reduced.add_argument('--vehicle', help="report every timestep of this vehicle instead of a summary over all vehicles")
+    reduced.add_argument('--single-lane', action='store_true')
+    reduced.set_defaults(handler=_reduced_range)
+
+    efficiency = commands.add_parser('efficiency', help="node and exposed-node totals of one vehicle at its initial and reduced range")
+    efficiency.add_argument('--vehicle', required=True)
+    efficiency.set_defaults(handler=_efficiency)
+
+    fleet = commands.add_parser('fleet', help="node and exposed-node totals of every vehicle at its initial and dynamic range")
+    fleet.set_defaults(handler=_fleet)
+
+    exposed = commands.add_parser('exposed', help="exposed-node total over every vehicle and timestep")
+    exposed.set_defaults(handler=_exposed)
+
+    rsu = commands.add_parser('rsu', help="dynamic ranges from roadside-unit cell counts, compared with per-vehicle ranges")
+    rsu.add_argument('--cell-size', type=float, default=None, help="RSU cell side (default: same area as the transmission range)")
+    rsu.add_argument('--vehicle', help="compare this vehicle only instead of every vehicle")
+    rsu.add_argument('--single-lane', action='store_true')
+    rsu.set_defaults(handler=_rsu)
+
+    stream = commands.add_parser('stream', help="dynamic range of every vehicle, one JSON line per timestep of a live FCD feed (stdin by default)")
+    source = stream.add_mutually_exclusive_group()
+    source.add_argument('--follow', metavar='FILE', help="follow a growing trace file")
+    source.add_argument('--socket', metavar='ADDRESS', help="read from a Unix socket path or HOST:PORT")
+    stream.add_argument('--idle-timeout', type=float, default=None, help="stop following after this many seconds without data")
+    stream.add_argument('--budget', type=float, default=0.05, help="per-step latency budget in seconds")
+    stream.add_argument('--incremental', action='store_true', help="keep Verlet neighbour lists across steps")
+    stream.add_argument('--ranges', action='store_true', help="include every vehicle's range in the output")
+    stream.add_argument('--range', type=float, default=2.5, help="maximum transmission range")
+
+    for command in (reduced, efficiency, fleet, exposed, rsu):
+        command.add_argument('trace')
+        command.add_argument('--range', type=float, default=2.5, help="(initial) transmission range")
+    for command in (efficiency, fleet, exposed):
+        command.add_argument('--lanes', type=int, default=1)
+        command.add_argument('--expose', type=float, default=0.7, help="probability that an in-range neighbour is exposed")
+        command.add_argument('--seed', type=int, default=0)
+    return parser
+
+
+def startup_seconds():
+    """Wall time since the interpreter started, or since this module was imported where that is unknown."""
+    try:
+        # Process start time in clock ticks since boot, against the system uptime
+        import os
+
+        with open('/proc/self/stat') as f:
+            started = int(f.read().rsplit(')', 1)[1].split()[19]) / os.sysconf('SC_CLK_TCK')
+        with open('/proc/uptime') as f:
+            return float(f.read().split()[0]) - started
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.perf_counter() - _STARTED
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Import the trace loader (and with it NumPy) before measuring, so that the budget covers it
+    if args.command == 'stream':
+        import importlib
+
+        importlib.import_module('.stream', __package__)
+    elif args.no_cache:
+        from .fcd import extract_vehicle_positions as load
+    else:
+        from .trace_cache import load_cached_trajectory as load
+    startup = startup_seconds()
+    if startup > args.startup_budget:
+        print(f"Warning: start-up took {startup:.3f} s, over the {args.startup_budget:.3f} s budget", file=sys.stderr)
+
+    start = time.perf_counter()
+    if args.command == 'stream':
+        json.dump({'command': args.command, 'startup_seconds': startup, 'latency': _stream(args)}, sys.stdout)
+        sys.stdout.write('\n')
+        return 0
+    result = args.handler(args, load(args.trace))
+    json.dump({'command': args.command, 'trace': args.trace, 'startup_seconds': startup, 'compute_seconds': time.perf_counter() - start, 'result': result}, sys.stdout)
+    sys.stdout.write('\n')
+    return 0
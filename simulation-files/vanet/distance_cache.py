@@ -0,0 +1,59 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from . import profiling
+
+DEFAULT_MAXSIZE = 4096
+
+
+class DistanceCache:
+    """Bounded LRU cache of sorted neighbour distances per (vehicle, time).
+
+    The first query for a vehicle at a time sorts its distances to every other
+    vehicle in that frame; after that, "how many within r" is a binary search,
+    so sweeps over many ranges or exposure settings never rescan the frame.
+    """
+
+    def __init__(self, trajectory, maxsize=DEFAULT_MAXSIZE, include_self=False):
+        self.trajectory = trajectory
+        self.maxsize = maxsize
+        self.include_self = include_self
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def sorted_distances(self, vehicle_id, time):
+        key = (vehicle_id, float(time))
+        distances = self._entries.get(key)
+        if distances is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return distances
+        self.misses += 1
+        distances = self._compute(vehicle_id, time)
+        self._entries[key] = distances
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return distances
+
+    @profiling.instrumented('query')
+    def _compute(self, vehicle_id, time):
+        trajectory = self.trajectory
+        located = trajectory.locate(vehicle_id, time)
+        if located is None:
+            print(f"Error: Vehicle '{vehicle_id}' is not present at time {time}.")
+            return np.empty(0)
+        k, row = located
+        start, stop = trajectory.offsets[k], trajectory.offsets[k + 1]
+        distances = np.hypot(trajectory.x[start:stop] - trajectory.x[row], trajectory.y[start:stop] - trajectory.y[row])
+        if not self.include_self:
+            distances = np.delete(distances, row - start)
+        distances.sort()
+        return distances
+
+    def count_within(self, vehicle_id, time, transmission_range):
+        return int(np.searchsorted(self.sorted_distances(vehicle_id, time), transmission_range, side='right'))
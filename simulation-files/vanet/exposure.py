@@ -0,0 +1,44 @@
+import numpy as np
+
+from . import profiling
+
+
+class ExposureModel:
+    """Seeded model of which in-range neighbours become exposed nodes.
+
+    Every neighbour is exposed independently with probability
+    ``expose_percentage``. Draws come from a ``numpy.random.Generator`` so runs
+    with the same seed are reproducible.
+    """
+
+    def __init__(self, expose_percentage, seed=None):
+        if not 0 <= expose_percentage <= 1:
+            raise ValueError(f"expose_percentage must be within [0, 1], got {expose_percentage}")
+        self.expose_percentage = expose_percentage
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def substream(self, *key):
+        """Independent model for a sub-task (e.g. one trace file or sweep cell), reproducible from seed and key."""
+        if self.seed is None:
+            return ExposureModel(self.expose_percentage, self.rng.integers(2 ** 63))
+        return ExposureModel(self.expose_percentage, [self.seed, *key])
+
+    @profiling.instrumented('exposure')
+    def count(self, num_neighbours):
+        """Number of exposed nodes among ``num_neighbours`` (scalar or array) neighbours."""
+        return self.rng.binomial(num_neighbours, self.expose_percentage)
+
+    def paired_counts(self, count_initial, count_reduced):
+        """Exposed counts at two ranges of the same vehicle with common random numbers.
+
+        Neighbours within both ranges share one exposure draw, so the two
+        results differ only by the draws for the neighbours that are in just
+        one of the ranges. The initial vs reduced range comparison is then not
+        swamped by independent sampling noise.
+        """
+        count_initial = np.asarray(count_initial)
+        count_reduced = np.asarray(count_reduced)
+        shared = np.minimum(count_initial, count_reduced)
+        common = self.count(shared)
+        return common + self.count(count_initial - shared), common + self.count(count_reduced - shared)
@@ -0,0 +1,260 @@
+import re
+
+import numpy as np
+
+from . import profiling
+from .trajectory import Frame, TrajectoryBuilder, VehicleIds
+
+CHUNK_SIZE = 1 << 22
+# Decompressed chunks a background reader may hold ahead of the parser
+READ_AHEAD = 4
+
+# Leading bytes of the compressed formats, mapped to the module that reads them
+_MAGIC = (
+    (b'\x1f\x8b', 'gzip'),
+    (b'BZh', 'bz2'),
+    (b'\xfd7zXZ\x00', 'lzma'),
+    (b'\x28\xb5\x2f\xfd', 'zstandard'),
+)
+
+# SUMO writes id, x, y first; that layout is matched in one pass and any other
+# attribute order falls through to the generic <vehicle> branch.
+_TOKEN = re.compile(
+    rb'<timestep\b([^>]*)>'
+    rb'|<(/)timestep\s*>'
+    rb'|<vehicle\s+id="([^"]+)"\s+x="([^"]+)"\s+y="([^"]+)"[^>]*>'
+    rb'|<(vehicle)\b([^>]*)>'
+)
+_TIME = re.compile(rb'\stime="([^"]+)"')
+_ID = re.compile(rb'\sid="([^"]+)"')
+_X = re.compile(rb'\sx="([^"]+)"')
+_Y = re.compile(rb'\sy="([^"]+)"')
+
+
+class ParseStats:
+    def __init__(self):
+        self.frames = 0
+        self.vehicles = 0
+        self.malformed = 0
+
+    def __repr__(self):
+        return f"ParseStats(frames={self.frames}, vehicles={self.vehicles}, malformed={self.malformed})"
+
+
+class FcdParser:
+    """Incremental SUMO FCD parser.
+
+    Bytes are pushed in with feed() in chunks of any size and every completed
+    <timestep> comes back as a Frame whose ``vehicle`` column indexes
+    ``self.vehicle_ids``. Attributes may appear in any order. Vehicles with a
+    missing or unparsable id/x/y, or outside a timestep, are counted in
+    ``stats.malformed`` and skipped.
+    """
+
+    def __init__(self, vehicle_ids=None):
+        self.vehicle_ids = vehicle_ids if vehicle_ids is not None else VehicleIds()
+        self.stats = ParseStats()
+        self._pending = b''
+        self._time = None
+        self._ids = []
+        self._x = []
+        self._y = []
+        self._raw_index = {}
+
+    def feed(self, data):
+        data = self._pending + data
+        end = data.rfind(b'<')
+        # The last tag may straddle the chunk boundary; hold it back unless it is complete
+        if end == -1 or data.find(b'>', end) != -1:
+            end = len(data)
+        self._pending = data[end:]
+        return self._scan(data[:end] if end < len(data) else data)
+
+    def close(self):
+        frames = self._scan(self._pending)
+        if self._pending.startswith(b'<vehicle') and b'>' not in self._pending:
+            # Truncated final vehicle entry
+            self.stats.malformed += 1
+        self._pending = b''
+        if self._time is not None:
+            frames.append(self._emit())
+        return frames
+
+    def _scan(self, data):
+        frames = []
+        ids, xs, ys = self._ids, self._x, self._y
+        in_frame = self._time is not None
+        for attributes, closing, vehicle_id, x, y, vehicle, other in _TOKEN.findall(data):
+            if vehicle_id and in_frame:
+                ids.append(vehicle_id)
+                xs.append(x)
+                ys.append(y)
+            elif vehicle_id or vehicle:
+                if vehicle:
+                    vehicle_id, x, y = _ID.search(other), _X.search(other), _Y.search(other)
+                if not in_frame or vehicle_id is None or x is None or y is None:
+                    self.stats.malformed += 1
+                    continue
+                ids.append(vehicle_id.group(1))
+                xs.append(x.group(1))
+                ys.append(y.group(1))
+            else:
+                if in_frame:
+                    frames.append(self._emit())
+                    ids, xs, ys = self._ids, self._x, self._y
+                if not closing:
+                    self._start(attributes)
+                in_frame = self._time is not None
+        return frames
+
+    def _start(self, attributes):
+        time = _TIME.search(attributes)
+        try:
+            self._time = float(time.group(1))
+        except (AttributeError, ValueError):
+            self.stats.malformed += 1
+
+    def _emit(self):
+        ids, xs, ys = self._ids, self._x, self._y
+        try:
+            x = np.array(xs, dtype=np.bytes_).astype(np.float64)
+            y = np.array(ys, dtype=np.bytes_).astype(np.float64)
+        except ValueError:
+            ids, x, y = self._convert_slow(ids, xs, ys)
+        raw_index = self._raw_index
+        vehicle = [raw_index.get(raw_id) for raw_id in ids]
+        if None in vehicle:
+            for i, raw_id in enumerate(ids):
+                if vehicle[i] is None:
+                    vehicle[i] = raw_index[raw_id] = self.vehicle_ids.intern(raw_id.decode())
+        vehicle = np.array(vehicle, dtype=np.int32)
+        frame = Frame(self._time, vehicle, x, y)
+        self.stats.frames += 1
+        self.stats.vehicles += len(ids)
+        self._time = None
+        self._ids, self._x, self._y = [], [], []
+        return frame
+
+    def _convert_slow(self, ids, xs, ys):
+        # At least one coordinate failed to parse; drop only the offending vehicles
+        kept_ids, kept_x, kept_y = [], [], []
+        for vehicle_id, x, y in zip(ids, xs, ys):
+            try:
+                x, y = float(x), float(y)
+            except ValueError:
+                self.stats.malformed += 1
+                continue
+            kept_ids.append(vehicle_id)
+            kept_x.append(x)
+            kept_y.append(y)
+        return kept_ids, np.array(kept_x, dtype=np.float64), np.array(kept_y, dtype=np.float64)
+
+
+def trace_compression(path):
+    """Module decompressing the trace at ``path`` (gzip, bz2, lzma or zstandard), or None for plain XML.
+
+    Detected from the file's leading bytes, so the file name does not matter.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(6)
+    for magic, module in _MAGIC:
+        if head.startswith(magic):
+            return module
+    return None
+
+
+def open_trace(path):
+    """Binary file object over the XML of a plain or compressed trace, decompressing as it is read."""
+    compression = trace_compression(path)
+    if compression is None:
+        return open(path, 'rb')
+    if compression == 'zstandard':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError(f"Reading zstd-compressed trace '{path}' requires the zstandard package") from None
+        f = open(path, 'rb')
+        return zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+    import importlib
+
+    return importlib.import_module(compression).open(path, 'rb')
+
+
+def iter_frames(source, chunk_size=CHUNK_SIZE, parser=None):
+    """Yield Frames from a path or binary file object, reading it in fixed-size chunks.
+
+    Compressed traces given by path are decompressed on a background thread
+    while the parser works on the previous chunks, without the expanded XML
+    ever touching the disk.
+    """
+    parser = parser if parser is not None else FcdParser()
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        compressed = trace_compression(source) is not None
+        with open_trace(source) as f:
+            yield from _iter_chunks(_read_ahead(f, chunk_size) if compressed else _read_chunks(f, chunk_size), parser)
+    else:
+        yield from _iter_chunks(_read_chunks(source, chunk_size), parser)
+
+
+def _read_chunks(f, chunk_size):
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _read_ahead(f, chunk_size, depth=READ_AHEAD):
+    # Chunks of f read by a background thread, at most ``depth`` ahead; zlib, bz2 and lzma release the GIL
+    import queue
+    import threading
+
+    chunks = queue.Queue(depth)
+    stop = threading.Event()
+
+    def read():
+        try:
+            while not stop.is_set():
+                chunk = f.read(chunk_size)
+                chunks.put(chunk)
+                if not chunk:
+                    return
+        except Exception as error:
+            chunks.put(error)
+
+    reader = threading.Thread(target=read, name='fcd-read-ahead', daemon=True)
+    reader.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if isinstance(chunk, Exception):
+                raise chunk
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        # Unblock a reader waiting on a full queue; it stops before its next read
+        stop.set()
+        while reader.is_alive():
+            try:
+                chunks.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        reader.join()
+
+
+def _iter_chunks(chunks, parser):
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+@profiling.instrumented('parse')
+def extract_vehicle_positions(xml_file, dtype=np.float64):
+    builder = TrajectoryBuilder(dtype)
+    parser = FcdParser(builder.vehicle_ids)
+    for frame in iter_frames(xml_file, parser=parser):
+        builder.add_frame(frame)
+    if parser.stats.malformed:
+        print(f"Warning: Skipped {parser.stats.malformed} malformed entries in '{xml_file}'.")
+    return builder.build()
@@ -0,0 +1,55 @@
+"""Density and dynamic range of every vehicle at every timestep, as (T, N) arrays."""
+from collections import namedtuple
+
+import numpy as np
+
+from . import profiling
+from .pipeline import dynamic_transmission_range, reduced_range_pipeline
+
+# (T, N) arrays indexed [frame, vehicle]; ``present`` marks the vehicles in each frame, the rest hold 0 or NaN
+FleetRanges = namedtuple('FleetRanges', ['times', 'vehicle_ids', 'present', 'count_initial', 'density', 'dynamic_range', 'count_reduced'])
+# Network-wide exposed-node totals; ``*_per_step`` arrays have one entry per frame
+FleetExposure = namedtuple('FleetExposure', ['total_nodes', 'total_exposed_initial', 'total_exposed_reduced', 'exposed_initial_per_step', 'exposed_reduced_per_step'])
+
+
+@profiling.instrumented('fleet')
+def fleet_ranges(trajectory, max_transmission_range, include_self=False, single_lane=False):
+    """FleetRanges of the whole trace from one batched pipeline pass over all vehicles.
+
+    Memory is T x N per array, so traces with many short-lived vehicles are
+    better served by reduced_range_pipeline's per-sample arrays.
+    """
+    result = reduced_range_pipeline(trajectory, max_transmission_range, include_self=include_self, single_lane=single_lane)
+    shape = (len(trajectory.times), len(trajectory.vehicle_ids))
+    frame = trajectory.sample_frame[result.rows]
+    present = np.zeros(shape, dtype=bool)
+    present[frame, result.vehicle] = True
+    count_initial = np.zeros(shape, dtype=np.int64)
+    count_initial[frame, result.vehicle] = result.count_initial
+    density = np.full(shape, np.nan)
+    density[frame, result.vehicle] = result.density
+    dynamic_range = np.full(shape, np.nan)
+    dynamic_range[frame, result.vehicle] = dynamic_transmission_range(result.density, max_transmission_range)
+    count_reduced = np.zeros(shape, dtype=np.int64)
+    count_reduced[frame, result.vehicle] = result.count_reduced
+    return FleetRanges(trajectory.times, trajectory.vehicle_ids, present, count_initial, density, dynamic_range, count_reduced)
+
+
+def fleet_exposure(fleet, exposure):
+    """Exposed nodes of every vehicle at its initial and dynamic range, summed over the network.
+
+    Both ranges share exposure draws for the neighbours they have in common,
+    as in ExposureModel.paired_counts.
+    """
+    exposed_initial, exposed_reduced = exposure.paired_counts(fleet.count_initial[fleet.present], fleet.count_reduced[fleet.present])
+    frame = np.nonzero(fleet.present)[0]
+    num_frames = len(fleet.times)
+    exposed_initial_per_step = np.bincount(frame, weights=exposed_initial, minlength=num_frames).astype(np.int64)
+    exposed_reduced_per_step = np.bincount(frame, weights=exposed_reduced, minlength=num_frames).astype(np.int64)
+    return FleetExposure(
+        int(fleet.count_initial.sum()),
+        int(exposed_initial_per_step.sum()),
+        int(exposed_reduced_per_step.sum()),
+        exposed_initial_per_step,
+        exposed_reduced_per_step,
+    )
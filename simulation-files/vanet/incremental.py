@@ -0,0 +1,219 @@
+import numpy as np
+
+from . import profiling
+from .batch import neighbour_counts, neighbour_pairs
+from .spatial import GridIndex
+
+# Smallest and largest automatic skin, as fractions of the transmission range
+SKIN_FRACTION = 0.25
+MAX_SKIN_FRACTION = 1.0
+# Steps an automatic skin should keep the pair list valid for
+LIST_STEPS = 4
+# Above this many arrivals since the last rebuild, as a fraction of the frame, the list is rebuilt
+REBUILD_FRACTION = 0.25
+
+
+class VerletNeighbours:
+    """Neighbour pair list carried from one timestep to the next (a Verlet list).
+
+    Each vehicle has a reference position, which is where it was when the
+    list was last built. The list holds every pair of vehicles whose
+    reference positions are within ``transmission_range + skin`` of each
+    other. While no vehicle is more than half the skin from its reference
+    position, every pair that is within range is guaranteed to be in the
+    list. Counting is then one vectorised distance check over the list
+    instead of a neighbour search.
+
+    update() rebuilds the list only once some vehicle has drifted further
+    than that. Arrivals search for their own pairs in a GridIndex of the
+    reference positions, and departures are dropped from the list, so a
+    step without a rebuild costs O(N) plus the work for the arrivals.
+    Vehicles are the integer indices of Trajectory.vehicle.
+
+    Without an explicit ``skin`` it is sized from the largest per-step
+    displacement seen, so that the list lasts about LIST_STEPS steps. When
+    vehicles move so far per step that even a skin of MAX_SKIN_FRACTION of
+    the range would not last that long, no list is kept and counts come
+    from one batched pass over the current frame (``batched`` is then True).
+    The engine is therefore never much slower than batch.neighbour_counts.
+    """
+
+    def __init__(self, transmission_range, skin=None):
+        self.transmission_range = float(transmission_range)
+        self.adaptive = skin is None
+        self.skin = SKIN_FRACTION * self.transmission_range if skin is None else float(skin)
+        self.batched = False
+        self.step_displacement = None
+        self.rebuilds = 0
+        self._vehicles = np.empty(0, dtype=np.int64)
+        self._row = np.empty(0, dtype=np.int64)
+        self._present = np.zeros(0, dtype=bool)
+        self._x = np.empty(0)
+        self._y = np.empty(0)
+        self._ref_x = np.empty(0)
+        self._ref_y = np.empty(0)
+        self._i = np.empty(0, dtype=np.int64)
+        self._j = np.empty(0, dtype=np.int64)
+        self._counts = None
+        # Reference grid of the last rebuild, and the vehicles that arrived since
+        self._grid = None
+        self._grid_vehicles = np.empty(0, dtype=np.int64)
+        self._in_grid = np.zeros(0, dtype=bool)
+        self._recent = np.empty(0, dtype=np.int64)
+
+    @property
+    def list_range(self):
+        return self.transmission_range + self.skin
+
+    def __len__(self):
+        return len(self._vehicles)
+
+    def __contains__(self, vehicle):
+        return 0 <= vehicle < len(self._present) and bool(self._present[vehicle])
+
+    @profiling.instrumented('incremental')
+    def update(self, vehicles, x, y):
+        """Advance to the next frame; returns the number of vehicles whose pairs were searched for."""
+        vehicles = np.asarray(vehicles, dtype=np.int64)
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self._reserve(int(vehicles.max()) + 1 if len(vehicles) else 0)
+        stayed = self._present[vehicles]
+        if stayed.any():
+            step2 = (x[stayed] - self._x[vehicles[stayed]]) ** 2 + (y[stayed] - self._y[vehicles[stayed]]) ** 2
+            self.step_displacement = float(np.sqrt(step2.max()))
+        present = np.zeros(len(self._present), dtype=bool)
+        present[vehicles] = True
+        self._present = present
+        self._vehicles = vehicles
+        self._row[vehicles] = np.arange(len(vehicles))
+        self._x[vehicles] = x
+        self._y[vehicles] = y
+        self._counts = None
+
+        rebuild = False
+        if self.adaptive and self.step_displacement is not None:
+            wanted = max(2 * LIST_STEPS * self.step_displacement, SKIN_FRACTION * self.transmission_range)
+            self.batched = wanted > MAX_SKIN_FRACTION * self.transmission_range
+            if self.batched:
+                self._ref_x[:] = self._ref_y[:] = np.nan
+                self._i = self._j = np.empty(0, dtype=np.int64)
+                self._grid = None
+                return 0
+            # The skin changes only with a rebuild: when the list would go stale too soon, or is far too wide
+            if wanted > self.skin or wanted < self.skin / 2:
+                self.skin = wanted
+                rebuild = True
+        if not rebuild:
+            old = vehicles[stayed & np.isfinite(self._ref_x[vehicles])]
+            drift2 = (self._x[old] - self._ref_x[old]) ** 2 + (self._y[old] - self._ref_y[old]) ** 2
+            rebuild = len(drift2) > 0 and drift2.max() > (self.skin / 2) ** 2
+        if rebuild:
+            self._rebuild_all(vehicles)
+            self.rebuilds += len(vehicles)
+            return len(vehicles)
+
+        # Departures leave the list; vehicles without a reference position are new and need their pairs
+        keep = present[self._i] & present[self._j]
+        self._i, self._j = self._i[keep], self._j[keep]
+        self._ref_x[~present] = np.nan
+        self._ref_y[~present] = np.nan
+        self._in_grid &= present
+        arrivals = vehicles[~np.isfinite(self._ref_x[vehicles])]
+        if self._grid is None or len(self._recent) + len(arrivals) > REBUILD_FRACTION * len(vehicles):
+            self._rebuild_all(vehicles)
+            self.rebuilds += len(vehicles)
+            return len(vehicles)
+        if len(arrivals):
+            self._add_arrivals(vehicles, arrivals)
+        self.rebuilds += len(arrivals)
+        return len(arrivals)
+
+    def neighbours(self, vehicle, include_self=False):
+        """Vehicles currently within the transmission range of ``vehicle``."""
+        if vehicle not in self:
+            raise KeyError(vehicle)
+        if self.batched:
+            candidates = self._vehicles[self._vehicles != vehicle]
+        else:
+            candidates = self._j[self._i == vehicle]
+        d2 = (self._x[candidates] - self._x[vehicle]) ** 2 + (self._y[candidates] - self._y[vehicle]) ** 2
+        within = candidates[d2 <= self.transmission_range ** 2]
+        if include_self:
+            within = np.append(within, vehicle)
+        return within
+
+    def count(self, vehicle, include_self=False):
+        if vehicle not in self:
+            raise KeyError(vehicle)
+        return int(self.counts([vehicle], include_self)[0])
+
+    def counts(self, vehicles, include_self=False):
+        """Neighbour counts of ``vehicles``; every count of the frame is computed once and reused."""
+        if self._counts is None:
+            if self.batched:
+                self._counts = np.zeros(len(self._present), dtype=np.int64)
+                self._counts[self._vehicles] = neighbour_counts(self._x[self._vehicles], self._y[self._vehicles], self.transmission_range)
+            else:
+                d2 = (self._x[self._i] - self._x[self._j]) ** 2 + (self._y[self._i] - self._y[self._j]) ** 2
+                self._counts = np.bincount(self._i[d2 <= self.transmission_range ** 2], minlength=len(self._present))
+        return self._counts[np.asarray(vehicles, dtype=np.int64)] + (1 if include_self else 0)
+
+    def _reserve(self, size):
+        grow = size - len(self._present)
+        if grow > 0:
+            self._present = np.append(self._present, np.zeros(grow, dtype=bool))
+            self._x = np.append(self._x, np.full(grow, np.nan))
+            self._y = np.append(self._y, np.full(grow, np.nan))
+            self._ref_x = np.append(self._ref_x, np.full(grow, np.nan))
+            self._ref_y = np.append(self._ref_y, np.full(grow, np.nan))
+            self._row = np.append(self._row, np.full(grow, -1, dtype=np.int64))
+            self._in_grid = np.append(self._in_grid, np.zeros(grow, dtype=bool))
+
+    def _add_arrivals(self, vehicles, arrivals):
+        # Earlier arrivals still present; those that left since have lost their reference position
+        recent = self._recent[np.isfinite(self._ref_x[self._recent])]
+        self._ref_x[arrivals] = self._x[arrivals]
+        self._ref_y[arrivals] = self._y[arrivals]
+        pieces_i, pieces_j = [self._i], [self._j]
+        for vehicle in arrivals.tolist():
+            found = self._grid_vehicles[self._grid.query(self._ref_x[vehicle], self._ref_y[vehicle], self.list_range)]
+            found = found[self._in_grid[found]]
+            pieces_i += [np.full(len(found), vehicle), found]
+            pieces_j += [found, np.full(len(found), vehicle)]
+        # Among the arrivals since the rebuild only the new ones search; pairs between two new ones come from both sides
+        others = np.concatenate((recent, arrivals))
+        radius = np.concatenate((np.full(len(recent), -1.0), np.full(len(arrivals), self.list_range)))
+        i, j, _ = neighbour_pairs(self._ref_x[others], self._ref_y[others], radius)
+        one_sided = radius[j] < 0
+        pieces_i += [others[i], others[j[one_sided]]]
+        pieces_j += [others[j], others[i[one_sided]]]
+        self._i = np.concatenate(pieces_i)
+        self._j = np.concatenate(pieces_j)
+        self._recent = others
+
+    def _rebuild_all(self, vehicles):
+        self._ref_x[:] = np.nan
+        self._ref_y[:] = np.nan
+        self._ref_x[vehicles] = self._x[vehicles]
+        self._ref_y[vehicles] = self._y[vehicles]
+        i, j, _ = neighbour_pairs(self._x[vehicles], self._y[vehicles], self.list_range)
+        self._i, self._j = vehicles[i], vehicles[j]
+        self._grid = GridIndex(self._x[vehicles], self._y[vehicles], max(self.list_range, 1e-9))
+        self._grid_vehicles = vehicles
+        self._in_grid[:] = False
+        self._in_grid[vehicles] = True
+        self._recent = np.empty(0, dtype=np.int64)
+
+
+def track_neighbour_counts(trajectory, vehicle_id, transmission_range, include_self=False, skin=None):
+    """Neighbour count of ``vehicle_id`` at each of its timesteps, with the pair list carried across frames."""
+    engine = VerletNeighbours(transmission_range, skin)
+    vehicle = trajectory.vehicle_index(vehicle_id)
+    times = trajectory[vehicle_id].times
+    counts = np.empty(len(times), dtype=np.int64)
+    for n, time in enumerate(times):
+        frame = trajectory.frame_at(time)
+        engine.update(frame.vehicle, frame.x, frame.y)
+        counts[n] = engine.count(vehicle, include_self)
+    return counts
@@ -0,0 +1,25 @@
+import numpy as np
+
+from . import profiling
+
+# Lower bound on the grid cell size so tiny or zero ranges do not create degenerate grids
+MIN_CELL_SIZE = 1.0
+
+
+@profiling.instrumented('query')
+def count_vehicles_within_range(trajectory, vehicle_id, time, transmission_range, include_self=False, cell_size=None):
+    """Number of vehicles present at ``time`` within ``transmission_range`` of ``vehicle_id``.
+
+    Neighbours come from the frame's cached GridIndex, bucketed by ``cell_size``
+    (the transmission range unless given) the first time the frame is queried.
+    """
+    located = trajectory.locate(vehicle_id, time)
+    if located is None:
+        print(f"Error: Vehicle '{vehicle_id}' is not present at time {time}.")
+        return 0
+    k, row = located
+    grid = trajectory.spatial_index(k, cell_size or max(transmission_range, MIN_CELL_SIZE))
+    within = grid.query(trajectory.x[row], trajectory.y[row], transmission_range)
+    if not include_self:
+        return int(np.count_nonzero(within != row - trajectory.offsets[k]))
+    return len(within)
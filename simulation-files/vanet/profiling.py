@@ -0,0 +1,212 @@
+"""Opt-in per-stage instrumentation: wall time, call counts, counters and peak memory.
+
+Set ``VANET_PROFILE`` to a report prefix (or to 1 for an automatic name), or
+call enable() before importing the modules to profile. When profiling is off,
+instrumented() hands back the undecorated function and stage() is a no-op,
+so nothing is paid. At exit the run is written to ``<prefix>.json`` and to
+``<prefix>.folded``, which holds collapsed stacks of self time in
+microseconds for flamegraph.pl or speedscope. Process pools created with
+pool_options() report from their workers too; those stats are merged into
+the parent's report.
+"""
+import atexit
+import os
+import sys
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+ENV_VAR = 'VANET_PROFILE'
+
+ENABLED = False
+_output = None
+_stack = []
+_paths = {}
+_started = None
+
+
+def enable(output=None):
+    """Switch profiling on for the rest of the process; the report goes to ``output`` (a prefix) at exit."""
+    global ENABLED, _output, _started
+    import tracemalloc
+
+    if ENABLED:
+        return
+    ENABLED = True
+    if output in (None, '', '1', 'true', 'yes'):
+        script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+        output = f"vanet-profile-{script}-{os.getpid()}"
+    _output = output
+    _started = time.perf_counter()
+    tracemalloc.start()
+    _instrument_pyplot()
+    atexit.register(write_report)
+
+
+def instrumented(name):
+    """Decorator timing every call of the function as stage ``name``; returns the function as is when profiling is off."""
+    def decorate(function):
+        if not ENABLED:
+            return function
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with _Stage(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def stage(name):
+    """Context manager timing a block as stage ``name``."""
+    return _Stage(name) if ENABLED else nullcontext()
+
+
+def add(**counters):
+    """Add to counters (e.g. vehicles_scanned) of the innermost running stage; guard calls with ``if ENABLED``."""
+    if _stack:
+        frame_counters = _stack[-1].counters
+        for key, value in counters.items():
+            frame_counters[key] = frame_counters.get(key, 0) + value
+
+
+class _Stage:
+    __slots__ = ('name', 'start', 'children', 'peak', 'counters')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        import tracemalloc
+
+        if _stack:
+            _stack[-1].peak = max(_stack[-1].peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.children = 0.0
+        self.peak = 0
+        self.counters = {}
+        _stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        import tracemalloc
+
+        elapsed = time.perf_counter() - self.start
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        path = tuple(frame.name for frame in _stack)
+        _stack.pop()
+        if _stack:
+            _stack[-1].children += elapsed
+            _stack[-1].peak = max(_stack[-1].peak, self.peak)
+        tracemalloc.reset_peak()
+        stats = _paths.get(path)
+        if stats is None:
+            stats = _paths[path] = {'calls': 0, 'seconds': 0.0, 'self_seconds': 0.0, 'peak_bytes': 0, 'counters': {}}
+        stats['calls'] += 1
+        stats['seconds'] += elapsed
+        stats['self_seconds'] += elapsed - self.children
+        stats['peak_bytes'] = max(stats['peak_bytes'], self.peak)
+        for key, value in self.counters.items():
+            stats['counters'][key] = stats['counters'].get(key, 0) + value
+        return False
+
+
+def _instrument_pyplot():
+    # Scripts import pyplot before vanet, so figure rendering can be timed without touching them
+    pyplot = sys.modules.get('matplotlib.pyplot')
+    if pyplot is not None:
+        for function_name in ('show', 'savefig'):
+            setattr(pyplot, function_name, instrumented('plot')(getattr(pyplot, function_name)))
+
+
+def pool_options():
+    """Keyword arguments for ProcessPoolExecutor so that its workers are profiled as well."""
+    if not ENABLED:
+        return {}
+    return {'initializer': _init_worker, 'initargs': (_output,)}
+
+
+def _init_worker(output):
+    global ENABLED, _output
+    import multiprocessing.util
+    import tracemalloc
+
+    # Forked workers inherit the parent's stats; start from a clean slate
+    _paths.clear()
+    del _stack[:]
+    if not ENABLED:
+        ENABLED = True
+        tracemalloc.start()
+    _output = f"{output}.worker-{os.getpid()}"
+    # Pool workers leave through multiprocessing's exit handling, which skips atexit
+    multiprocessing.util.Finalize(None, _write_worker_paths, exitpriority=10)
+
+
+def _write_worker_paths():
+    import json
+
+    with open(f"{_output}.json", 'w') as f:
+        json.dump([{'path': list(path), **stats} for path, stats in _paths.items()], f)
+
+
+def _merge_worker_paths():
+    import glob
+    import json
+
+    for name in glob.glob(f"{glob.escape(_output)}.worker-*.json"):
+        with open(name) as f:
+            worker_paths = json.load(f)
+        os.unlink(name)
+        for stats in worker_paths:
+            path = tuple(stats.pop('path'))
+            merged = _paths.setdefault(path, {'calls': 0, 'seconds': 0.0, 'self_seconds': 0.0, 'peak_bytes': 0, 'counters': {}})
+            for key in ('calls', 'seconds', 'self_seconds'):
+                merged[key] += stats[key]
+            merged['peak_bytes'] = max(merged['peak_bytes'], stats['peak_bytes'])
+            for key, value in stats['counters'].items():
+                merged['counters'][key] = merged['counters'].get(key, 0) + value
+
+
+def report():
+    """The statistics so far: totals per stage name and per call path."""
+    import tracemalloc
+
+    stages = {}
+    for path, stats in _paths.items():
+        # Inclusive time only counts outermost calls, so recursion is not double counted
+        total = stages.setdefault(path[-1], {'calls': 0, 'seconds': 0.0, 'self_seconds': 0.0, 'peak_bytes': 0, 'counters': {}})
+        total['calls'] += stats['calls']
+        total['self_seconds'] += stats['self_seconds']
+        if path[-1] not in path[:-1]:
+            total['seconds'] += stats['seconds']
+        total['peak_bytes'] = max(total['peak_bytes'], stats['peak_bytes'])
+        for key, value in stats['counters'].items():
+            total['counters'][key] = total['counters'].get(key, 0) + value
+    for total in stages.values():
+        if 'vehicles_scanned' in total['counters']:
+            total['counters']['vehicles_scanned_per_call'] = total['counters']['vehicles_scanned'] / total['calls']
+    return {
+        'argv': sys.argv,
+        'wall_seconds': time.perf_counter() - _started if _started is not None else 0.0,
+        'peak_bytes': tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0,
+        'stages': stages,
+        'paths': [{'path': list(path), **stats} for path, stats in _paths.items()],
+    }
+
+
+def write_report(output=None):
+    import json
+
+    _merge_worker_paths()
+    output = output or _output
+    with open(f"{output}.json", 'w') as f:
+        json.dump(report(), f, indent=2)
+    with open(f"{output}.folded", 'w') as f:
+        for path, stats in sorted(_paths.items()):
+            f.write(f"{';'.join(path)} {int(round(stats['self_seconds'] * 1e6))}\n")
+    print(f"Profile written to {output}.json and {output}.folded", file=sys.stderr)
+
+
+if os.environ.get(ENV_VAR):
+    enable(os.environ[ENV_VAR])
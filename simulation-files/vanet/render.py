@@ -0,0 +1,86 @@
+import os
+import sys
+
+import numpy as np
+
+from . import profiling
+
+# Set to a directory to save figures there (headless) instead of opening a window
+FIGURE_DIR_ENV = 'VANET_FIGURE_DIR'
+# Comma-separated output formats for saved figures
+FIGURE_FORMATS_ENV = 'VANET_FIGURE_FORMATS'
+FORMATS = ('png',)
+# Lines longer than this are decimated before drawing
+MAX_POINTS = 5000
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of a series to ``threshold`` points.
+
+    Keeps the first and last points and, from each bucket in between, the
+    point that spans the largest triangle with the previously kept point and
+    the mean of the next bucket, so peaks and the overall shape survive.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    # Bucket boundaries of the n - 2 inner points, in exact integer arithmetic
+    edges = np.arange(threshold - 1, dtype=np.int64) * (n - 2) // (threshold - 2) + 1
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        mean_x = x[stop:next_stop].mean()
+        mean_y = y[stop:next_stop].mean()
+        area = np.abs((x[previous] - mean_x) * (y[start:stop] - y[previous]) - (x[previous] - x[start:stop]) * (mean_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        keep[bucket + 1] = previous
+    return x[keep], y[keep]
+
+
+def decimate_figure(figure, max_points=MAX_POINTS):
+    """LTTB every line of the figure that has more than ``max_points`` points."""
+    for axes in figure.axes:
+        for line in axes.get_lines():
+            x, y = line.get_xdata(), line.get_ydata()
+            if len(x) > max_points:
+                line.set_data(*lttb(x, y, max_points))
+
+
+def save_figure(figure, output_dir, name, formats=FORMATS):
+    """Write the figure as ``output_dir/name.<format>`` for each format; returns the paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        figure.savefig(path, format=fmt, bbox_inches='tight')
+        paths.append(path)
+    return paths
+
+
+def show_figure(name=None, max_points=MAX_POINTS):
+    """Drop-in for plt.show() that decimates long lines first.
+
+    With VANET_FIGURE_DIR set the current figure is saved there instead,
+    named after the running script unless ``name`` is given, so scripts can
+    run on headless nodes.
+    """
+    import matplotlib.pyplot as plt
+
+    figure = plt.gcf()
+    output_dir = os.environ.get(FIGURE_DIR_ENV)
+    # Figure.savefig bypasses the profiled pyplot functions, so time the headless path here
+    with profiling.stage('plot'):
+        decimate_figure(figure, max_points)
+        if output_dir:
+            name = name or os.path.splitext(os.path.basename(sys.argv[0]))[0]
+            formats = [fmt.strip() for fmt in os.environ.get(FIGURE_FORMATS_ENV, ','.join(FORMATS)).split(',') if fmt.strip()]
+            save_figure(figure, output_dir, name, formats)
+            plt.close(figure)
+    if not output_dir:
+        plt.show()
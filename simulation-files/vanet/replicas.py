@@ -0,0 +1,47 @@
+from collections import namedtuple
+
+import numpy as np
+
+from . import profiling
+
+QUANTILES = (0.05, 0.5, 0.95)
+
+# Per-time-slot statistics over the replica axis; quantiles has one row per requested level
+ReplicaSummary = namedtuple('ReplicaSummary', ['mean', 'variance', 'quantiles', 'levels', 'replicas'])
+
+
+def summarise_replicas(samples, levels=QUANTILES):
+    """Mean, variance (ddof=1) and quantiles over axis 0 of an ``(R, T)`` array of replica outcomes."""
+    samples = np.asarray(samples, dtype=np.float64)
+    variance = samples.var(axis=0, ddof=1) if len(samples) > 1 else np.zeros(samples.shape[1:])
+    return ReplicaSummary(samples.mean(axis=0), variance, np.quantile(samples, levels, axis=0), tuple(levels), len(samples))
+
+
+def run_replicas(simulate, replicas, chunk_size=None, max_workers=None, seed=None, **params):
+    """Run ``replicas`` realisations of ``simulate`` in chunks and stack the results.
+
+    ``simulate`` is a module-level function ``simulate(seeds, **params)``
+    that advances its whole chunk together and returns an
+    ``(len(seeds), ...)`` array or a tuple of them. ``seeds`` holds one
+    SeedSequence per replica, spawned from ``seed``, and each replica should
+    draw only from its own, so results for a given seed are the same
+    whatever ``chunk_size`` and ``max_workers`` are. With ``max_workers=0``
+    the chunks run in-process, otherwise on a process pool.
+    """
+    chunk_size = chunk_size or replicas
+    seeds = np.random.SeedSequence(seed).spawn(replicas)
+    chunks = [seeds[start:start + chunk_size] for start in range(0, replicas, chunk_size)]
+    if max_workers == 0 or len(chunks) == 1:
+        results = [simulate(chunk, **params) for chunk in chunks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=max_workers, **profiling.pool_options()) as pool:
+            results = list(pool.map(_run_chunk, [simulate] * len(chunks), chunks, [params] * len(chunks)))
+    if isinstance(results[0], tuple):
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+    return np.concatenate(results)
+
+
+def _run_chunk(simulate, seeds, params):
+    return simulate(seeds, **params)
@@ -0,0 +1,167 @@
+import numpy as np
+
+
+def ring_range_counts(road, positions, transmission_range):
+    """Occupied cells within ``transmission_range`` cells of each position, wrapping around the ring.
+
+    One cumulative sum over the occupancy array answers every window, so the
+    cost is O(L + N) however many vehicles are asked about. The range may be
+    one value per position. The window includes the position's own cell.
+    A ``(R, L)`` road with ``(R, N)`` positions counts R replicas at once.
+    """
+    road = np.asarray(road)
+    length = road.shape[-1]
+    prefix = np.zeros(road.shape[:-1] + (length + 1,), dtype=np.int64)
+    np.cumsum(road, axis=-1, out=prefix[..., 1:])
+    total = prefix[..., -1:]
+    positions = np.asarray(positions, dtype=np.int64)
+    reach = np.floor(np.asarray(transmission_range, dtype=np.float64)).astype(np.int64)
+    width = np.clip(2 * reach + 1, 0, length)
+    start = positions - reach
+    stop = start + width
+
+    def occupied_before(k):
+        # Occupied cells in [0, k) of the road unrolled around the ring
+        return np.take_along_axis(prefix, k % length, axis=-1) + (k // length) * total
+
+    return occupied_before(stop) - occupied_before(start)
+
+
+def random_layouts(length, num_vehicles, replicas, rng=None):
+    """``(replicas, num_vehicles)`` distinct cells per replica, drawn uniformly from the road.
+
+    ``rng`` may also be a list of one seed or Generator per replica, so that
+    each layout comes from its replica's own stream.
+    """
+    if isinstance(rng, (list, tuple)):
+        return np.stack([random_layouts(length, num_vehicles, 1, replica_rng)[0] for replica_rng in rng])
+    rng = np.random.default_rng(rng)
+    cells = rng.permuted(np.broadcast_to(np.arange(length), (replicas, length)), axis=1)
+    return cells[:, :num_vehicles]
+
+
+class RingRoad:
+    """Nagel-Schreckenberg traffic on a circular road of ``length`` cells.
+
+    step() advances every vehicle at once. Each step a vehicle accelerates by
+    one cell up to ``max_speed``, brakes to the gap in front of it, slows by one
+    with ``slowdown_probability``, then moves. Vehicles never overtake, so the
+    state is stored in ring order, sorted once at construction, and gaps are
+    plain differences; ``positions`` and ``speeds`` give it back in the order
+    the vehicles were passed in.
+
+    ``positions`` of shape ``(R, N)`` make R independent replicas of the road
+    that advance together in the same vectorised step. They share one RNG,
+    unless ``seed`` is a list of one seed or Generator per replica; every
+    replica then draws its slowdowns from its own stream, and its outcome
+    does not depend on which other replicas it is batched with.
+
+    ``rigid`` replaces the traffic rules with the legacy fixed-speed model:
+    every vehicle moves by its own speed each step whatever is in front of
+    it, so vehicles may pass through or share cells with each other, and
+    occupancy() and range_counts() then count shared cells once.
+    """
+
+    def __init__(self, length, positions, speeds=None, max_speed=5, slowdown_probability=0.0, seed=None, rigid=False):
+        self.length = int(length)
+        self.rigid = rigid
+        positions = np.asarray(positions, dtype=np.int64) % self.length
+        speeds = np.zeros_like(positions) if speeds is None else np.broadcast_to(np.asarray(speeds, dtype=np.int64), positions.shape)
+        self.max_speed = int(max_speed)
+        self.slowdown_probability = slowdown_probability
+        if isinstance(seed, (list, tuple)):
+            self.rng = [np.random.default_rng(replica_seed) for replica_seed in seed]
+        else:
+            self.rng = np.random.default_rng(seed)
+        self.time = 0
+        self._order = np.argsort(positions, axis=-1, kind='stable')
+        self._positions = np.take_along_axis(positions, self._order, axis=-1)
+        self._speeds = np.take_along_axis(speeds, self._order, axis=-1)
+        if (np.diff(self._positions, axis=-1) == 0).any():
+            raise ValueError("RingRoad cells can hold at most one vehicle")
+        if isinstance(self.rng, list) and len(self.rng) != self.replicas:
+            raise ValueError(f"RingRoad needs one seed per replica, got {len(self.rng)} for {self.replicas} replicas")
+
+    def __len__(self):
+        return self._positions.shape[-1]
+
+    @property
+    def replicas(self):
+        """Number of replicas, or None for a single road."""
+        return self._positions.shape[0] if self._positions.ndim > 1 else None
+
+    @property
+    def positions(self):
+        return self._unordered(self._positions)
+
+    @property
+    def speeds(self):
+        return self._unordered(self._speeds)
+
+    def _unordered(self, values):
+        result = np.empty_like(values)
+        np.put_along_axis(result, self._order, values, axis=-1)
+        return result
+
+    def gaps(self):
+        """Empty cells between each vehicle and the one ahead of it, in ring order."""
+        positions = self._positions
+        gaps = np.empty_like(positions)
+        if len(self):
+            np.subtract(positions[..., 1:], positions[..., :-1], out=gaps[..., :-1])
+            gaps[..., -1] = positions[..., 0] - positions[..., -1]
+            gaps -= 1
+            gaps %= self.length
+        return gaps
+
+    def occupancy(self):
+        road = np.zeros(self._positions.shape[:-1] + (self.length,), dtype=np.int8)
+        np.put_along_axis(road, self._positions, 1, axis=-1)
+        return road
+
+    def step(self):
+        if self.rigid:
+            self._step_rigid()
+            return
+        speeds = np.minimum(self._speeds + 1, self.max_speed)
+        np.minimum(speeds, self.gaps(), out=speeds)
+        if self.slowdown_probability:
+            if isinstance(self.rng, list):
+                draws = np.stack([rng.random(len(self)) for rng in self.rng])
+            else:
+                draws = self.rng.random(speeds.shape)
+            speeds -= draws < self.slowdown_probability
+            np.maximum(speeds, 0, out=speeds)
+        self._speeds = speeds
+        positions = self._positions + speeds
+        positions %= self.length
+        self._positions = positions
+        self.time += 1
+
+    def _step_rigid(self):
+        positions = (self._positions + self._speeds) % self.length
+        # Wrapping (or unequal speeds) breaks ring order; restore it
+        resort = np.argsort(positions, axis=-1, kind='stable')
+        self._positions = np.take_along_axis(positions, resort, axis=-1)
+        self._speeds = np.take_along_axis(self._speeds, resort, axis=-1)
+        self._order = np.take_along_axis(self._order, resort, axis=-1)
+        self.time += 1
+
+    def range_counts(self, transmission_range, include_self=False):
+        """Vehicles within ``transmission_range`` cells of every vehicle, with wrap-around."""
+        counts = ring_range_counts(self.occupancy(), self.positions, transmission_range)
+        if not include_self:
+            counts -= np.asarray(transmission_range) >= 0
+        return counts
+
+    def densities(self, transmission_range):
+        """Share of the other vehicles within range of every vehicle."""
+        return self.range_counts(transmission_range) / max(len(self) - 1, 1)
+
+    def exposed_counts(self, transmission_range):
+        """Vehicles out of range of every vehicle, i.e. exposed nodes."""
+        return len(self) - 1 - self.range_counts(transmission_range)
+
+    def run(self, time_steps):
+        for _ in range(time_steps):
+            self.step()
@@ -0,0 +1,102 @@
+"""Infrastructure-based density: roadside units (RSUs) that count the vehicles in their grid cell."""
+from collections import namedtuple
+
+import numpy as np
+
+from . import profiling
+from .pipeline import WINDOW_SAMPLES, dynamic_transmission_range, reduced_range_pipeline
+
+# Per-sample results, aligned with trajectory sample ``rows`` (time-major order)
+RsuDensity = namedtuple('RsuDensity', ['rows', 'times', 'vehicle', 'cell', 'cell_count', 'density', 'rsu_range'])
+# RSU-derived ranges against the per-vehicle ones, over the same samples
+RangeComparison = namedtuple('RangeComparison', ['per_vehicle_range', 'rsu_range', 'mean_abs_error', 'bias', 'rmse', 'correlation'])
+
+
+def rsu_cell_size(transmission_range):
+    """Side of a square RSU cell covering the same area as a vehicle's circular transmission range."""
+    return transmission_range * np.sqrt(3.14159)
+
+
+def rsu_cells(x, y, cell_size, origin):
+    """Integer (column, row) of the RSU cell holding each position."""
+    cx = np.floor((np.asarray(x, dtype=np.float64) - origin[0]) / cell_size).astype(np.int64)
+    cy = np.floor((np.asarray(y, dtype=np.float64) - origin[1]) / cell_size).astype(np.int64)
+    return cx, cy
+
+
+@profiling.instrumented('rsu')
+def rsu_density_pipeline(trajectory, max_transmission_range, cell_size=None, origin=None, vehicle_ids=None, include_self=False, window_samples=WINDOW_SAMPLES):
+    """Density and dynamic range of every sample of the chosen vehicles, as reported by the RSU of its cell.
+
+    The road is tiled with square cells of side ``cell_size`` (by default
+    the same area as a disc of ``max_transmission_range``) starting at
+    ``origin`` (default: the south-west corner of the trace). Each RSU counts
+    the vehicles in its cell every timestep, with one bincount over (frame,
+    cell) keys for a run of frames, and every vehicle is handed its cell's
+    count. Cells that are never occupied are dropped first, so the cost is
+    O(N) per step however large the area is, with no neighbour query.
+    Unless ``include_self`` is set a vehicle does not count itself, as in
+    the per-vehicle density.
+    """
+    num_samples = trajectory.num_samples
+    if vehicle_ids is None:
+        rows = np.arange(num_samples)
+    else:
+        wanted = np.zeros(len(trajectory.vehicle_ids), dtype=bool)
+        wanted[[trajectory.vehicle_index(vehicle_id) for vehicle_id in vehicle_ids]] = True
+        rows = np.flatnonzero(wanted[trajectory.vehicle])
+    cell_size = cell_size or rsu_cell_size(max_transmission_range)
+
+    cell = np.zeros(num_samples, dtype=np.int64)
+    cell_count = np.zeros(num_samples, dtype=np.int64)
+    if num_samples:
+        if origin is None:
+            origin = (float(trajectory.x.min()), float(trajectory.y.min()))
+        cx, cy = rsu_cells(trajectory.x, trajectory.y, cell_size, origin)
+        # Samples outside a user-given origin's grid still land in a cell of their own
+        cx -= min(int(cx.min()), 0)
+        cy -= min(int(cy.min()), 0)
+        rows_per_column = int(cy.max()) + 1
+        cell = cx * rows_per_column + cy
+        # Number only the occupied cells, so that keys do not span the whole bounding box
+        occupied, occupied_cell = np.unique(cell, return_inverse=True)
+        num_cells = len(occupied)
+        frames_per_run = max(1, window_samples // num_cells)
+        offsets = trajectory.offsets
+        for first in range(0, len(trajectory.times), frames_per_run):
+            last = min(first + frames_per_run, len(trajectory.times))
+            start, stop = int(offsets[first]), int(offsets[last])
+            keys = (trajectory.sample_frame[start:stop].astype(np.int64) - first) * num_cells + occupied_cell[start:stop]
+            cell_count[start:stop] = np.bincount(keys)[keys]
+
+    neighbours = cell_count[rows] - (0 if include_self else 1)
+    density = neighbours / cell_size ** 2
+    return RsuDensity(
+        rows,
+        trajectory.times[trajectory.sample_frame[rows]],
+        trajectory.vehicle[rows],
+        cell[rows],
+        cell_count[rows],
+        density,
+        dynamic_transmission_range(density, max_transmission_range),
+    )
+
+
+def compare_rsu_ranges(trajectory, max_transmission_range, cell_size=None, origin=None, vehicle_ids=None, include_self=False, single_lane=False):
+    """Error of the RSU-derived dynamic ranges against ranges from each vehicle's own neighbour count."""
+    per_vehicle = reduced_range_pipeline(trajectory, max_transmission_range, vehicle_ids=vehicle_ids, include_self=include_self, single_lane=single_lane)
+    rsu = rsu_density_pipeline(trajectory, max_transmission_range, cell_size, origin, vehicle_ids, include_self)
+    per_vehicle_range = dynamic_transmission_range(per_vehicle.density, max_transmission_range)
+    error = rsu.rsu_range - per_vehicle_range
+    if len(error) > 1 and per_vehicle_range.std() > 0 and rsu.rsu_range.std() > 0:
+        correlation = float(np.corrcoef(per_vehicle_range, rsu.rsu_range)[0, 1])
+    else:
+        correlation = float('nan')
+    return RangeComparison(
+        per_vehicle_range,
+        rsu.rsu_range,
+        float(np.abs(error).mean()) if len(error) else 0.0,
+        float(error.mean()) if len(error) else 0.0,
+        float(np.sqrt((error ** 2).mean())) if len(error) else 0.0,
+        correlation,
+    )
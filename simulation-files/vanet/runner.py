@@ -0,0 +1,78 @@
+from collections import namedtuple
+
+from . import profiling
+from .batch import neighbour_counts
+from .exposure import ExposureModel
+from .fleet import fleet_exposure, fleet_ranges
+from .pipeline import reduced_range_pipeline
+from .trace_cache import load_cached_trajectory
+
+# One trace file and the lane layout it was simulated with
+LaneTrace = namedtuple('LaneTrace', ['path', 'num_lanes'])
+
+
+@profiling.instrumented('metric')
+def efficiency_metrics(trajectory, num_lanes, reference_vehicle_id, initial_transmission_range, exposure):
+    """Node and exposed-node totals of one reference vehicle at its initial and reduced ranges."""
+    result = reduced_range_pipeline(trajectory, initial_transmission_range, vehicle_ids=[reference_vehicle_id], include_self=True)
+    num_exposed_initial, num_exposed_reduced = exposure.substream(num_lanes).paired_counts(result.count_initial, result.count_reduced)
+    return {
+        'total_nodes': int(result.count_initial.sum()),
+        'total_exposed_nodes_initial': int(num_exposed_initial.sum()),
+        'total_exposed_nodes_reduced': int(num_exposed_reduced.sum()),
+    }
+
+
+def efficiency_cell(trajectory, num_lanes, reference_vehicle_id, initial_transmission_range, expose_percentage, seed=0):
+    """efficiency_metrics with JSON-friendly parameters, for use as a sweep metric."""
+    return efficiency_metrics(trajectory, num_lanes, reference_vehicle_id, initial_transmission_range, ExposureModel(expose_percentage, seed))
+
+
+@profiling.instrumented('metric')
+def fleet_efficiency_metrics(trajectory, num_lanes, initial_transmission_range, exposure):
+    """efficiency_metrics summed over every vehicle of the trace instead of one reference vehicle."""
+    totals = fleet_exposure(fleet_ranges(trajectory, initial_transmission_range, include_self=True), exposure.substream(num_lanes))
+    return {
+        'total_nodes': totals.total_nodes,
+        'total_exposed_nodes_initial': totals.total_exposed_initial,
+        'total_exposed_nodes_reduced': totals.total_exposed_reduced,
+    }
+
+
+@profiling.instrumented('metric')
+def exposed_node_metrics(trajectory, num_lanes, transmission_range, exposure):
+    """Vehicle count and exposed-node total over every vehicle at every timestep."""
+    file_exposure = exposure.substream(num_lanes)
+    total_exposed_nodes = 0
+    for frame in trajectory.frames():
+        total_exposed_nodes += int(file_exposure.count(neighbour_counts(frame.x, frame.y, transmission_range).sum()))
+    return {
+        'total_nodes': len(trajectory),
+        'total_exposed_nodes': total_exposed_nodes,
+    }
+
+
+def _run_trace(trace, metric, params):
+    trajectory = load_cached_trajectory(trace.path)
+    result = metric(trajectory, trace.num_lanes, **params)
+    result.update(path=trace.path, num_lanes=trace.num_lanes)
+    return result
+
+
+def run_lane_comparison(traces, metric, max_workers=None, **params):
+    """Parse each trace and apply ``metric`` to it in a worker process.
+
+    ``traces`` is an iterable of LaneTrace (or ``(path, num_lanes)`` pairs) and
+    ``metric`` a module-level function ``metric(trajectory, num_lanes, **params)``
+    returning a dict. Results come back as one dict per trace, sorted by lane
+    count. ``max_workers=0`` runs everything in-process.
+    """
+    traces = [LaneTrace(*trace) for trace in traces]
+    if max_workers == 0:
+        results = [_run_trace(trace, metric, params) for trace in traces]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=max_workers, **profiling.pool_options()) as pool:
+            results = list(pool.map(_run_trace, traces, [metric] * len(traces), [params] * len(traces)))
+    return sorted(results, key=lambda result: result['num_lanes'])
@@ -0,0 +1,117 @@
+"""Trajectories published once in shared memory, so that worker processes attach to them instead of unpickling copies."""
+import json
+from collections import namedtuple
+from itertools import repeat
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from . import profiling
+from .trajectory import Trajectory
+
+# Trajectory constructor arguments, then the derived per-sample frame index
+_COLUMNS = ('times', 'offsets', 'vehicle', 'x', 'y', 'vehicle_order', 'vehicle_offsets', 'sample_frame')
+
+# Picklable description of a published Trajectory: (segment, size) of the JSON
+# vehicle ids and (segment, dtype, shape) of every column, in _COLUMNS order
+SharedTrajectoryHandle = namedtuple('SharedTrajectoryHandle', ['vehicle_ids', 'columns'])
+
+# Trajectories this process has attached to, with the segments keeping them mapped
+_attached = {}
+
+
+class SharedTrajectory:
+    """A Trajectory copied once into ``multiprocessing.shared_memory`` segments.
+
+    Pass ``handle`` to workers and call attach() there to get a Trajectory
+    whose columns are read-only views of the same pages. The per-vehicle
+    and per-frame indexes are published too, so workers never rebuild
+    them. The segments are unlinked by close(), or on leaving the ``with``
+    block. Memory is freed once the last attached process has exited.
+    """
+
+    def __init__(self, trajectory):
+        self._segments = []
+        try:
+            ids = json.dumps(trajectory.vehicle_ids).encode()
+            vehicle_ids = (self._publish(ids), len(ids))
+            columns = []
+            for column in _COLUMNS:
+                array = np.ascontiguousarray(getattr(trajectory, column))
+                name = self._publish(array)
+                columns.append((name, array.dtype.str, array.shape))
+        except BaseException:
+            self.close()
+            raise
+        self.handle = SharedTrajectoryHandle(vehicle_ids, tuple(columns))
+
+    def _publish(self, data):
+        view = memoryview(data).cast('B')
+        # Zero-sized segments are not allowed
+        segment = shared_memory.SharedMemory(create=True, size=max(len(view), 1))
+        self._segments.append(segment)
+        segment.buf[:len(view)] = view
+        return segment.name
+
+    def close(self):
+        # Drop this process's own attachment; its mapping goes away with the last view of it
+        _attached.pop(getattr(self, 'handle', None), None)
+        for segment in self._segments:
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def attach(handle):
+    """Trajectory backed by the shared segments of ``handle``, without copying; cached per process."""
+    trajectory = _attached.get(handle)
+    if trajectory is not None:
+        return trajectory[0]
+    segments = []
+    name, size = handle.vehicle_ids
+    segments.append(shared_memory.SharedMemory(name=name))
+    vehicle_ids = json.loads(bytes(segments[-1].buf[:size]))
+    columns = []
+    for name, dtype, shape in handle.columns:
+        segments.append(shared_memory.SharedMemory(name=name))
+        column = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segments[-1].buf)
+        column.flags.writeable = False
+        columns.append(column)
+    trajectory = Trajectory(vehicle_ids, *columns[:-1])
+    trajectory._sample_frame = columns[-1]
+    _attached[handle] = trajectory, segments
+    return trajectory
+
+
+def _run_task(function, handle, task):
+    return function(attach(handle), **task)
+
+
+def run_shared(function, trajectory, tasks, max_workers=None, chunksize=1):
+    """Results of ``function(trajectory, **task)`` for every task dict, computed in worker processes.
+
+    The trajectory is published once with SharedTrajectory and each worker
+    attaches to it on its first task, so only the handle and the task are
+    pickled per call. This holds whether the tasks are reference vehicles,
+    time windows or parameter cells. The segments are removed once the pool
+    has shut down. ``function`` must be a module-level function, and
+    ``max_workers=0`` runs everything in-process.
+    """
+    tasks = list(tasks)
+    if max_workers == 0:
+        return [function(trajectory, **task) for task in tasks]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with SharedTrajectory(trajectory) as shared:
+        with ProcessPoolExecutor(max_workers=max_workers, **profiling.pool_options()) as pool:
+            return list(pool.map(_run_task, repeat(function), repeat(shared.handle), tasks, chunksize=chunksize))
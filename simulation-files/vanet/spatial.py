@@ -0,0 +1,68 @@
+import numpy as np
+
+from . import profiling
+
+
+class GridIndex:
+    """Uniform grid over one frame's coordinates for fixed-radius range queries.
+
+    Points are bucketed into square cells of ``cell_size`` and sorted by cell,
+    so the candidates in a column of cells form one contiguous slice. A query
+    of radius r only inspects the ceil(r / cell_size) rings of cells around the
+    query point, and compares squared distances.
+    """
+
+    @profiling.instrumented('index')
+    def __init__(self, x, y, cell_size):
+        if cell_size <= 0:
+            raise ValueError(f"cell_size must be positive, got {cell_size}")
+        self.cell_size = float(cell_size)
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        cx, cy = self._cells(x, y)
+        self._cx0 = int(cx.min()) if len(cx) else 0
+        self._cy0 = int(cy.min()) if len(cy) else 0
+        self._stride = int(cy.max()) - self._cy0 + 1 if len(cy) else 1
+        keys = self._keys(cx - self._cx0, cy - self._cy0)
+        self.order = np.argsort(keys, kind='stable')
+        self._keys_sorted = keys[self.order]
+        self._x = x[self.order]
+        self._y = y[self.order]
+
+    def __len__(self):
+        return len(self.order)
+
+    def _cells(self, x, y):
+        return np.floor(x / self.cell_size).astype(np.int64), np.floor(y / self.cell_size).astype(np.int64)
+
+    def _keys(self, cx, cy):
+        return cx * self._stride + cy
+
+    def _candidate_slices(self, px, py, radius):
+        rings = max(int(np.ceil(radius / self.cell_size)), 1)
+        cx, cy = self._cells(np.float64(px), np.float64(py))
+        cx, cy = int(cx) - self._cx0, int(cy) - self._cy0
+        # Clip the column span to the occupied rows so keys never wrap into a neighbouring column
+        low = max(cy - rings, 0)
+        high = min(cy + rings, self._stride - 1)
+        if low > high:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        columns = np.arange(cx - rings, cx + rings + 1, dtype=np.int64)
+        starts = np.searchsorted(self._keys_sorted, self._keys(columns, low), side='left')
+        stops = np.searchsorted(self._keys_sorted, self._keys(columns, high), side='right')
+        return starts, stops
+
+    def query(self, px, py, radius):
+        """Positions (in the original point order) of all points within ``radius`` of (px, py)."""
+        if radius < 0 or not len(self.order):
+            return np.empty(0, dtype=np.int64)
+        starts, stops = self._candidate_slices(px, py, radius)
+        candidates = np.concatenate([np.arange(start, stop) for start, stop in zip(starts, stops) if stop > start] or [np.empty(0, dtype=np.int64)])
+        if profiling.ENABLED:
+            profiling.add(vehicles_scanned=len(candidates))
+        dx = self._x[candidates] - px
+        dy = self._y[candidates] - py
+        return self.order[candidates[dx * dx + dy * dy <= radius * radius]]
+
+    def count(self, px, py, radius):
+        return len(self.query(px, py, radius))
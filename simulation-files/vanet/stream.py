@@ -0,0 +1,153 @@
+import os
+import socket
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import neighbour_counts
+from .fcd import FcdParser
+from .incremental import VerletNeighbours
+from .pipeline import calculate_density, dynamic_transmission_range
+
+CHUNK_SIZE = 1 << 16
+# Seconds allowed from a frame arriving to its ranges being emitted
+LATENCY_BUDGET = 0.05
+# Vehicles ranged between two deadline checks
+BLOCK_SIZE = 1024
+
+# Ranges of one timestep; ``stale`` marks vehicles that kept their previous range because the budget ran out
+StepRanges = namedtuple('StepRanges', ['time', 'vehicle_ids', 'density', 'transmission_range', 'stale', 'latency'])
+
+
+def follow_file(path, poll_interval=0.05, idle_timeout=None, chunk_size=CHUNK_SIZE):
+    """Yield bytes appended to a file as they are written, like ``tail -f``.
+
+    Starts at the beginning of the file. Stops after ``idle_timeout`` seconds
+    without new data (never when None).
+    """
+    with open(path, 'rb') as f:
+        idle_since = time.monotonic()
+        while True:
+            chunk = f.read(chunk_size)
+            if chunk:
+                idle_since = time.monotonic()
+                yield chunk
+                continue
+            if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                return
+            time.sleep(poll_interval)
+
+
+def read_pipe(f, chunk_size=CHUNK_SIZE):
+    """Yield bytes from a pipe (e.g. ``sys.stdin.buffer``) as soon as they arrive, without waiting for full chunks."""
+    fd = f.fileno()
+    while True:
+        chunk = os.read(fd, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_socket(address, chunk_size=CHUNK_SIZE):
+    """Yield bytes from a stream socket: a Unix socket path or a ``(host, port)`` pair standing in for a TraCI feed."""
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as connection:
+        connection.connect(address)
+        while True:
+            chunk = connection.recv(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+class DensityController:
+    """Per-timestep dynamic transmission ranges for every vehicle in a live FCD stream.
+
+    Neighbour counts at ``max_transmission_range`` give each vehicle's
+    density, and the density shrinks its range. By default each frame is
+    counted with the batched engine, one block of ``block_size`` vehicles
+    at a time in x order, each block against only the vehicles within range
+    of its stretch of road. With ``incremental`` the spatial state is
+    instead kept in a VerletNeighbours pair list, which is only rebuilt once
+    vehicles have moved noticeably.
+
+    Either way ``latency_budget`` is checked between blocks, counted from
+    when the frame's bytes arrived. If it runs out mid-frame, the remaining
+    vehicles keep their previous range (or the maximum range, for new
+    arrivals) and are flagged stale.
+    """
+
+    def __init__(self, max_transmission_range, latency_budget=LATENCY_BUDGET, incremental=False, skin=None, block_size=BLOCK_SIZE):
+        self.max_transmission_range = max_transmission_range
+        self.latency_budget = latency_budget
+        self.block_size = block_size
+        self.engine = VerletNeighbours(max_transmission_range, skin) if incremental else None
+        self.latencies = []
+        self.overruns = 0
+        # Last emitted range of every vehicle index seen so far
+        self._ranges = np.empty(0)
+
+    def step(self, frame, vehicle_ids, arrived=None):
+        """Ranges for one Frame; ``arrived`` is when the frame became available (perf_counter seconds, default now)."""
+        arrived = time.perf_counter() if arrived is None else arrived
+        deadline = arrived + self.latency_budget
+        vehicles = np.asarray(frame.vehicle, dtype=np.int64)
+        if len(vehicles) and vehicles.max() >= len(self._ranges):
+            self._ranges = np.append(self._ranges, np.full(int(vehicles.max()) + 1 - len(self._ranges), self.max_transmission_range))
+        density = np.zeros(len(vehicles))
+        transmission_range = self._ranges[vehicles]
+        stale = np.ones(len(vehicles), dtype=bool)
+        if self.engine is None:
+            order = np.argsort(frame.x, kind='stable')
+            sorted_x = frame.x[order]
+        else:
+            self.engine.update(vehicles, frame.x, frame.y)
+            order = np.arange(len(vehicles))
+        for n, start in enumerate(range(0, len(vehicles), self.block_size)):
+            if n and time.perf_counter() > deadline:
+                break
+            block = order[start:start + self.block_size]
+            if self.engine is None:
+                # Only vehicles within range of the block's x extent can be its neighbours
+                lo = np.searchsorted(sorted_x, sorted_x[start] - self.max_transmission_range, side='left')
+                hi = np.searchsorted(sorted_x, sorted_x[start + len(block) - 1] + self.max_transmission_range, side='right')
+                nearby = order[lo:hi]
+                counts = neighbour_counts(frame.x[nearby], frame.y[nearby], self.max_transmission_range, rows=np.arange(start - lo, start - lo + len(block)))
+            else:
+                counts = self.engine.counts(vehicles[block])
+            density[block] = calculate_density(counts, self.max_transmission_range)
+            transmission_range[block] = dynamic_transmission_range(density[block], self.max_transmission_range)
+            stale[block] = False
+        self._ranges[vehicles] = transmission_range
+
+        latency = time.perf_counter() - arrived
+        self.latencies.append(latency)
+        if latency > self.latency_budget:
+            self.overruns += 1
+        return StepRanges(frame.time, [vehicle_ids[vehicle] for vehicle in vehicles.tolist()], density, transmission_range, stale, latency)
+
+    def latency_report(self):
+        """Step count, overruns and p50/p99/max step latency in seconds."""
+        latencies = np.array(self.latencies)
+        if not len(latencies):
+            return {'steps': 0, 'overruns': 0, 'p50': None, 'p99': None, 'max': None, 'budget': self.latency_budget}
+        p50, p99 = np.percentile(latencies, [50, 99])
+        return {'steps': len(latencies), 'overruns': self.overruns, 'p50': float(p50), 'p99': float(p99), 'max': float(latencies.max()), 'budget': self.latency_budget}
+
+
+def stream_ranges(chunks, controller, parser=None):
+    """Feed byte chunks through an FcdParser and yield the controller's StepRanges for each completed timestep.
+
+    Latency is counted from when the chunk completing a frame was received,
+    so frames waiting behind others from the same chunk, or behind a slow
+    consumer, are charged for the wait.
+    """
+    parser = parser if parser is not None else FcdParser()
+    arrived = time.perf_counter()
+    for chunk in chunks:
+        arrived = time.perf_counter()
+        for frame in parser.feed(chunk):
+            yield controller.step(frame, parser.vehicle_ids.names, arrived)
+    for frame in parser.close():
+        yield controller.step(frame, parser.vehicle_ids.names, arrived)
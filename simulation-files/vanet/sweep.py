@@ -0,0 +1,141 @@
+import hashlib
+import itertools
+import json
+import os
+import tempfile
+from collections import defaultdict
+from functools import lru_cache
+
+from . import profiling
+from .trace_cache import load_cached_trajectory, trace_fingerprint
+
+# Parsed traces kept per worker process, so consecutive tasks on one trace share it
+TRAJECTORY_CACHE_SIZE = 4
+
+
+def parameter_grid(axes):
+    """Every combination of the values in ``axes`` as a list of parameter dicts.
+
+    ``axes`` maps a parameter name to its values. A tuple of names maps to
+    tuples of values that vary together, e.g.
+    ``{('path', 'num_lanes'): [('a.txt', 1), ('b.txt', 2)], 'range': [2.5, 10]}``.
+    """
+    names = [name if isinstance(name, tuple) else (name,) for name in axes]
+    values = [values if isinstance(name, tuple) else [(value,) for value in values] for name, values in axes.items()]
+    return [
+        {name: value for group, combination in zip(names, cell) for name, value in zip(group, combination)}
+        for cell in itertools.product(*values)
+    ]
+
+
+class ResultsStore:
+    """Directory of finished sweep cells, one JSON file per cell, written atomically.
+
+    A cell is keyed by the metric, its parameters and the fingerprint of its
+    trace, so editing a trace or changing a parameter never returns a stale
+    result.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(metric_name, params, fingerprint):
+        blob = json.dumps({'metric': metric_name, 'params': params, 'trace': fingerprint}, sort_keys=True)
+        return hashlib.blake2b(blob.encode(), digest_size=16).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        with open(self._path(key)) as f:
+            return json.load(f)
+
+    def put(self, key, record):
+        fd, staging = tempfile.mkstemp(dir=self.directory, prefix='.staging-', suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(record, f)
+            os.replace(staging, self._path(key))
+        except BaseException:
+            os.unlink(staging)
+            raise
+
+    def __iter__(self):
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.json') and not name.startswith('.'):
+                yield self.get(name[:-len('.json')])
+
+
+@lru_cache(maxsize=TRAJECTORY_CACHE_SIZE)
+def _trajectory(path, fingerprint):
+    # The fingerprint is part of the cache key, so a regenerated trace is never served from a stale entry
+    return load_cached_trajectory(path)
+
+
+def _trajectory_loaded(path, fingerprint):
+    _trajectory(path, fingerprint)
+
+
+def _run_cells(metric, store_directory, fingerprint, tasks):
+    store = ResultsStore(store_directory)
+    for key, params in tasks:
+        cell = dict(params)
+        result = metric(_trajectory(cell.pop('path'), fingerprint), **cell)
+        store.put(key, {'params': params, 'result': result})
+    return len(tasks)
+
+
+def run_sweep(metric, grid, store, max_workers=None, cells_per_task=None, progress=None):
+    """Evaluate ``metric`` on every cell of ``grid`` that ``store`` does not already hold.
+
+    Every cell needs a ``path`` to a trace; the remaining parameters are
+    passed as keyword arguments to ``metric(trajectory, **params)``, a
+    module-level function returning a JSON-serialisable value. Each trace's
+    cells are split into about one task per worker, or into tasks of
+    ``cells_per_task`` cells, so a sweep over a single trace still uses every
+    worker. Traces are parsed into the trace cache before the cells start,
+    and workers memory-map them and keep them open across tasks, so the
+    split costs no re-parsing. Each cell is written to the store as soon as
+    it is done, and an interrupted sweep resumes where it stopped when
+    rerun. ``max_workers=0`` runs in-process. ``progress(done, total)`` is
+    called as tasks finish. Returns the stored records in grid order.
+    """
+    store = store if isinstance(store, ResultsStore) else ResultsStore(store)
+    metric_name = f"{metric.__module__}.{metric.__qualname__}"
+    fingerprints = {path: trace_fingerprint(path) for path in {cell['path'] for cell in grid}}
+    keys = [ResultsStore.key(metric_name, cell, fingerprints[cell['path']]) for cell in grid]
+
+    by_trace = defaultdict(list)
+    for key, cell in zip(keys, grid):
+        if key not in store:
+            by_trace[cell['path']].append((key, cell))
+    workers = 1 if max_workers == 0 else max_workers or os.cpu_count() or 1
+    tasks = []
+    for path, cells in by_trace.items():
+        step = cells_per_task or -(-len(cells) // workers)
+        tasks.extend((fingerprints[path], cells[start:start + step]) for start in range(0, len(cells), step))
+
+    total = sum(len(task) for _, task in tasks)
+    done = 0
+    if max_workers == 0:
+        for fingerprint, task in tasks:
+            done += _run_cells(metric, store.directory, fingerprint, task)
+            if progress:
+                progress(done, total)
+    elif tasks:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=max_workers, **profiling.pool_options()) as pool:
+            # Parse every trace once, in parallel, before several workers need it at the same time
+            list(pool.map(_trajectory_loaded, by_trace, [fingerprints[path] for path in by_trace]))
+            futures = [pool.submit(_run_cells, metric, store.directory, fingerprint, task) for fingerprint, task in tasks]
+            for future in as_completed(futures):
+                done += future.result()
+                if progress:
+                    progress(done, total)
+    return [store.get(key) for key in keys]
@@ -0,0 +1,32 @@
+import numpy as np
+
+LANE_WIDTH = 3.2
+_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n\n<fcd-export xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:noNamespaceSchemaLocation="http://sumo.dlr.de/xsd/fcd_file.xsd">\n'
+_VEHICLE = '        <vehicle id="%s" x="%.2f" y="%.2f" angle="90.00" type="DEFAULT_VEHTYPE" speed="%.2f" pos="%.2f" lane="E0_%d" slope="0.00"/>\n'
+
+
+def generate_fcd(path, num_vehicles, num_lanes=1, duration=100, density=0.05, speed=13.9, speed_jitter=0.1, step_length=1.0, seed=None):
+    """Write a synthetic SUMO FCD trace of traffic on a straight multi-lane road.
+
+    ``density`` is vehicles per metre per lane and sets the road length. The
+    vehicles start evenly spread over the lanes and drive at ``speed`` m/s,
+    varied by ``speed_jitter`` (a fraction) per step. They wrap around at the
+    end of the road, so the fleet size stays constant for all ``duration``
+    seconds. Returns the road length.
+    """
+    rng = np.random.default_rng(seed)
+    road_length = num_vehicles / (num_lanes * density)
+    ids = [f"f_0.{vehicle}" for vehicle in range(num_vehicles)]
+    lanes = np.arange(num_vehicles) % num_lanes
+    y = lanes * LANE_WIDTH
+    pos = np.sort(rng.uniform(0, road_length, num_vehicles))
+    with open(path, 'w') as f:
+        f.write(_HEADER)
+        for k in range(int(round(duration / step_length)) + 1):
+            speeds = speed * (1 + speed_jitter * rng.uniform(-1, 1, num_vehicles))
+            f.write(f'    <timestep time="{k * step_length:.2f}">\n')
+            f.write(''.join(_VEHICLE % row for row in zip(ids, pos.tolist(), y.tolist(), speeds.tolist(), pos.tolist(), lanes.tolist())))
+            f.write('    </timestep>\n')
+            pos = (pos + speeds * step_length) % road_length
+        f.write('</fcd-export>\n')
+    return road_length
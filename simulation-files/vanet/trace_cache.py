@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+
+import numpy as np
+
+from . import profiling
+from .fcd import extract_vehicle_positions
+from .trajectory import Trajectory
+
+CACHE_DIR_NAME = '.trace_cache'
+FORMAT_VERSION = 2
+# Bytes hashed from each end of the trace; together with size and mtime this identifies the file
+FINGERPRINT_BYTES = 1 << 20
+
+_COLUMNS = ('times', 'offsets', 'vehicle', 'x', 'y')
+# Derived per-vehicle index, saved so that opening a cached trace needs no argsort
+_INDEX_COLUMNS = ('vehicle_order', 'vehicle_offsets')
+
+
+def trace_fingerprint(xml_file):
+    stat = os.stat(xml_file)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(xml_file, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if stat.st_size > FINGERPRINT_BYTES:
+            f.seek(max(stat.st_size - FINGERPRINT_BYTES, FINGERPRINT_BYTES))
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def cache_path(xml_file, cache_dir=None, dtype=np.float64):
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(xml_file)), CACHE_DIR_NAME)
+    name = f"{os.path.basename(xml_file)}-v{FORMAT_VERSION}-{np.dtype(dtype).name}-{trace_fingerprint(xml_file)}"
+    return os.path.join(cache_dir, name)
+
+
+def save_trajectory(trajectory, directory):
+    """Write a Trajectory as one .npy file per column; the directory appears atomically."""
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix='.staging-')
+    try:
+        for column in _COLUMNS + _INDEX_COLUMNS:
+            np.save(os.path.join(staging, f"{column}.npy"), np.ascontiguousarray(getattr(trajectory, column)))
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump({'version': FORMAT_VERSION, 'vehicle_ids': trajectory.vehicle_ids}, f)
+        try:
+            os.rename(staging, directory)
+        except OSError:
+            # Another process finished writing the same cache entry first
+            if not os.path.isdir(directory):
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_trajectory(directory, mmap_mode='r'):
+    """Load a saved Trajectory, memory-mapping its columns by default."""
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported trace cache version {meta.get('version')} in '{directory}'")
+    times, offsets, vehicle, x, y, vehicle_order, vehicle_offsets = [np.load(os.path.join(directory, f"{column}.npy"), mmap_mode=mmap_mode) for column in _COLUMNS + _INDEX_COLUMNS]
+    if len(offsets) != len(times) + 1 or len(vehicle_offsets) != len(meta['vehicle_ids']) + 1 or not len(vehicle) == len(x) == len(y) == len(vehicle_order) == offsets[-1]:
+        raise ValueError(f"Inconsistent column lengths in trace cache '{directory}'")
+    return Trajectory(meta['vehicle_ids'], times, offsets, vehicle, x, y, vehicle_order, vehicle_offsets)
+
+
+def _discard(directory):
+    # Move a broken entry out of the way first, so readers never see it half deleted
+    trash = tempfile.mkdtemp(dir=os.path.dirname(directory), prefix='.discard-')
+    try:
+        os.rename(directory, os.path.join(trash, 'entry'))
+    except FileNotFoundError:
+        pass
+    shutil.rmtree(trash, ignore_errors=True)
+
+
+def _prune(directory):
+    # Entries of the same trace left behind by an older version of it or of the cache format
+    cache_dir, name = os.path.split(directory)
+    basename, version, dtype, fingerprint = name.rsplit('-', 3)
+    pattern = re.compile(rf"{re.escape(basename)}-v(\d+)-\w+-([0-9a-f]+)")
+    for entry in os.listdir(cache_dir):
+        match = pattern.fullmatch(entry)
+        if match and (f"v{match.group(1)}", match.group(2)) != (version, fingerprint):
+            _discard(os.path.join(cache_dir, entry))
+
+
+@profiling.instrumented('load')
+def load_cached_trajectory(xml_file, cache_dir=None, dtype=np.float64, mmap_mode='r'):
+    """Trajectory of an FCD trace, parsed once and memory-mapped from the binary cache afterwards.
+
+    The cache entry is keyed by the trace's size, mtime and a hash of its first
+    and last megabyte, so editing or regenerating the trace invalidates it.
+    An entry that cannot be loaded (corrupt, truncated) is replaced, and
+    entries for earlier versions of the trace are deleted once the new one
+    is written. If the cache cannot be written, the parsed trace is
+    returned uncached.
+    """
+    directory = cache_path(xml_file, cache_dir, dtype)
+    try:
+        return load_trajectory(directory, mmap_mode)
+    except (OSError, ValueError, EOFError):
+        pass
+    trajectory = extract_vehicle_positions(xml_file, dtype)
+    try:
+        if os.path.isdir(directory):
+            _discard(directory)
+        save_trajectory(trajectory, directory)
+        _prune(directory)
+        return load_trajectory(directory, mmap_mode)
+    except OSError as e:
+        print(f"Warning: Could not write trace cache '{directory}': {e}")
+        return trajectory
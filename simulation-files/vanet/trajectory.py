@@ -0,0 +1,231 @@
+from array import array
+from collections import OrderedDict, namedtuple
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from .spatial import GridIndex
+
+# Frame grids kept by Trajectory.spatial_index; each holds sorted copies of its frame
+GRID_CACHE_SIZE = 64
+
+# One simulation time step: the interned ids of the vehicles present and their coordinates
+Frame = namedtuple('Frame', ['time', 'vehicle', 'x', 'y'])
+
+
+class VehicleTrack(Sequence):
+    """Per-vehicle view of a Trajectory, indexable like the old list of (timestep, x, y) tuples."""
+
+    def __init__(self, trajectory, vehicle):
+        self.trajectory = trajectory
+        self.vehicle = vehicle
+        start, stop = trajectory.vehicle_offsets[vehicle:vehicle + 2]
+        self._rows = trajectory.vehicle_order[start:stop]
+
+    @property
+    def times(self):
+        return self.trajectory.times[self.trajectory.sample_frame[self._rows]]
+
+    @property
+    def x(self):
+        return self.trajectory.x[self._rows]
+
+    @property
+    def y(self):
+        return self.trajectory.y[self._rows]
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        row = self._rows[index]
+        trajectory = self.trajectory
+        return (float(trajectory.times[trajectory.sample_frame[row]]), float(trajectory.x[row]), float(trajectory.y[row]))
+
+
+class Trajectory(Mapping):
+    """Columnar store of an FCD trace.
+
+    Samples are kept time-major: the rows of frame k are ``offsets[k]:offsets[k + 1]``
+    of the ``vehicle``, ``x`` and ``y`` columns, and ``vehicle`` holds indices into
+    ``vehicle_ids``. Indexing by vehicle id returns a VehicleTrack, so code written
+    against the old ``{vehicle_id: [(timestep, x, y), ...]}`` dict keeps working.
+    """
+
+    def __init__(self, vehicle_ids, times, offsets, vehicle, x, y, vehicle_order=None, vehicle_offsets=None):
+        self.vehicle_ids = list(vehicle_ids)
+        self.times = np.asarray(times, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.vehicle = np.asarray(vehicle, dtype=np.int32)
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self._index = {vehicle_id: i for i, vehicle_id in enumerate(self.vehicle_ids)}
+        # Simulation time -> frame index, so lookups are by time rather than list position
+        self.time_index = {float(time): k for k, time in enumerate(self.times)}
+        # Per-vehicle index, derived on first use unless a saved copy is handed in
+        self._vehicle_order = vehicle_order
+        self._vehicle_offsets = vehicle_offsets
+        self._sample_frame = None
+        self._grids = OrderedDict()
+
+    @classmethod
+    def from_positions(cls, vehicle_positions, dtype=np.float64):
+        builder = TrajectoryBuilder(dtype)
+        samples = sorted((timestep, vehicle_id, x, y) for vehicle_id, positions in vehicle_positions.items() for timestep, x, y in positions)
+        for timestep, vehicle_id, x, y in samples:
+            builder.append(vehicle_id, timestep, x, y)
+        return builder.build()
+
+    @property
+    def num_samples(self):
+        return len(self.vehicle)
+
+    @property
+    def sample_frame(self):
+        # Frame index of every sample row
+        if self._sample_frame is None:
+            self._sample_frame = np.repeat(np.arange(len(self.times), dtype=np.int32), np.diff(self.offsets))
+        return self._sample_frame
+
+    @property
+    def vehicle_order(self):
+        # Sample rows grouped by vehicle, in time order within each vehicle
+        if self._vehicle_order is None:
+            self._vehicle_order = np.argsort(self.vehicle, kind='stable')
+        return self._vehicle_order
+
+    @property
+    def vehicle_offsets(self):
+        if self._vehicle_offsets is None:
+            counts = np.bincount(self.vehicle, minlength=len(self.vehicle_ids))
+            self._vehicle_offsets = np.concatenate(([0], np.cumsum(counts)))
+        return self._vehicle_offsets
+
+    def vehicle_index(self, vehicle_id):
+        return self._index[vehicle_id]
+
+    def locate(self, vehicle_id, time):
+        """Return (frame index, sample row) of a vehicle at a simulation time, or None if it is absent."""
+        k = self.time_index.get(float(time))
+        vehicle = self._index.get(vehicle_id)
+        if k is None or vehicle is None:
+            return None
+        start, stop = self.vehicle_offsets[vehicle:vehicle + 2]
+        rows = self.vehicle_order[start:stop]
+        i = np.searchsorted(self.sample_frame[rows], k)
+        if i == len(rows) or self.sample_frame[rows[i]] != k:
+            return None
+        return k, int(rows[i])
+
+    def frame_at(self, time):
+        return self.frame(self.time_index[float(time)])
+
+    def spatial_index(self, k, cell_size):
+        """GridIndex over frame k, built on first use and kept in a bounded LRU cache.
+
+        Any cell size answers every radius correctly, so the first caller fixes
+        the cell size of a frame's grid and later callers reuse it. Only the
+        GRID_CACHE_SIZE most recently used frames keep their grid, so a pass
+        over a long trace does not hold a copy of every frame.
+        """
+        grid = self._grids.get(k)
+        if grid is not None:
+            self._grids.move_to_end(k)
+            return grid
+        start, stop = self.offsets[k], self.offsets[k + 1]
+        grid = self._grids[k] = GridIndex(self.x[start:stop], self.y[start:stop], cell_size)
+        if len(self._grids) > GRID_CACHE_SIZE:
+            self._grids.popitem(last=False)
+        return grid
+
+    def frame(self, k):
+        start, stop = self.offsets[k], self.offsets[k + 1]
+        return Frame(float(self.times[k]), self.vehicle[start:stop], self.x[start:stop], self.y[start:stop])
+
+    def frames(self):
+        for k in range(len(self.times)):
+            yield self.frame(k)
+
+    def __getitem__(self, vehicle_id):
+        return VehicleTrack(self, self._index[vehicle_id])
+
+    def __iter__(self):
+        return iter(self.vehicle_ids)
+
+    def __len__(self):
+        return len(self.vehicle_ids)
+
+    def __contains__(self, vehicle_id):
+        return vehicle_id in self._index
+
+
+class VehicleIds:
+    """Interning table from vehicle id strings to dense integer indices."""
+
+    def __init__(self, names=()):
+        self.names = []
+        self._index = {}
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name):
+        index = self._index.get(name)
+        if index is None:
+            index = self._index[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+
+class TrajectoryBuilder:
+    """Accumulates samples in file order (time-major) into compact columns."""
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.vehicle_ids = VehicleIds()
+        self._times = array('d')
+        self._offsets = array('q', [0])
+        self._vehicle = array('i')
+        self._x = array('d')
+        self._y = array('d')
+
+    def append(self, vehicle_id, time, x, y):
+        self._start_frame(time)
+        self._vehicle.append(self.vehicle_ids.intern(vehicle_id))
+        self._x.append(x)
+        self._y.append(y)
+        self._offsets[-1] += 1
+
+    def extend(self, time, vehicle_ids, x, y):
+        vehicle = np.fromiter((self.vehicle_ids.intern(vehicle_id) for vehicle_id in vehicle_ids), dtype=np.int32, count=len(vehicle_ids))
+        self.add_frame(Frame(time, vehicle, x, y))
+
+    def add_frame(self, frame):
+        # frame.vehicle must already be interned in self.vehicle_ids
+        self._start_frame(frame.time)
+        self._vehicle.frombytes(np.asarray(frame.vehicle, dtype=np.int32).tobytes())
+        self._x.frombytes(np.asarray(frame.x, dtype=np.float64).tobytes())
+        self._y.frombytes(np.asarray(frame.y, dtype=np.float64).tobytes())
+        self._offsets[-1] += len(frame.vehicle)
+
+    def _start_frame(self, time):
+        if self._times and time < self._times[-1]:
+            raise ValueError(f"Timestep {time} appended after {self._times[-1]}; samples must be time-ordered.")
+        if self._times and time == self._times[-1]:
+            return
+        self._times.append(time)
+        self._offsets.append(self._offsets[-1])
+
+    def build(self):
+        return Trajectory(
+            self.vehicle_ids.names,
+            np.frombuffer(self._times, dtype=np.float64).copy(),
+            np.frombuffer(self._offsets, dtype=np.int64).copy(),
+            np.frombuffer(self._vehicle, dtype=np.int32).copy(),
+            np.asarray(self._x, dtype=self.dtype),
+            np.asarray(self._y, dtype=self.dtype),
+        )